@@ -1,10 +1,1183 @@
+import argparse
+import asyncio
+import copy
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
+import re
+import select
+import signal
+import struct
+import sys
+import threading
 import time
-from collections import defaultdict
-from dataclasses import dataclass, field
+import tracemalloc
+from array import array
+from bisect import bisect_right
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, fields, replace
+from enum import Enum
+from functools import partial
+from itertools import islice, product
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = None
+
+BLANK = '_'
+# never part of a definition: run_prefixes puts it where its inputs stop agreeing
+HOLE = '\x00hole'
+# how symbols are drawn by TuringMachine.print, the engine never sees these
+GLYPHS = {BLANK: '\033[31m⧈\033[0m'}
 
 
 @dataclass
-class TuringMachine:
+class CompiledMachine:
+    states: list[str]
+    symbols: list[str]
+    blank: int
+    initial: int
+    accepting: bytes
+    # flat tables indexed by state * len(symbols) + symbol, -1 = no move
+    next_state: array
+    write: array
+    move: array
+    # per state: None, or (direction, symbols it sweeps over, translate table)
+    sweeps: list
+    # per state: direction it keeps moving in forever on blank cells, else 0
+    runaway: list
+    state_ids: dict[str, int] = field(init=False, repr=False)
+    symbol_ids: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.state_ids = {name: i for i, name in enumerate(self.states)}
+        self.symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+
+
+def number_names(tm, used_states, used_symbols, extra_symbols=()):
+    # the sorted states and symbols a table covers, the declared ones plus
+    # those the transitions use, and the ids they get
+    states = sorted({tm.initial_state, *tm.states, *tm.accepting_states, *used_states})
+    symbols = sorted({tm.blank_symbol, *tm.symbols, *tm.input_symbols, *used_symbols,
+                      *extra_symbols})
+    if len(symbols) > 256:
+        raise ValueError('Tape cells hold one byte, at most 256 symbols are supported')
+    return (states, symbols, {name: i for i, name in enumerate(states)},
+            {name: i for i, name in enumerate(symbols)})
+
+
+def compile_machine(tm, extra_symbols=()):
+    states, symbols, state_ids, symbol_ids = number_names(
+        tm, [*(s for s, _ in tm.transitions), *(s for s, _, _ in tm.transitions.values())],
+        [*(a for _, a in tm.transitions), *(a for _, a, _ in tm.transitions.values())],
+        extra_symbols)
+
+    size = len(states) * len(symbols)
+    next_state = array('i', [-1]) * size
+    write = array('i', [0]) * size
+    move = array('b', [0]) * size
+    for (state, symbol), (new_state, new_symbol, direction) in tm.transitions.items():
+        i = state_ids[state] * len(symbols) + symbol_ids[symbol]
+        next_state[i] = state_ids[new_state]
+        write[i] = symbol_ids[new_symbol]
+        move[i] = direction
+
+    blank = symbol_ids[tm.blank_symbol]
+    runaway = [0] * len(states)
+    for state in range(len(states)):
+        i = state * len(symbols) + blank
+        if next_state[i] == state:
+            runaway[state] = move[i]
+
+    return CompiledMachine(
+        states=states,
+        symbols=symbols,
+        blank=blank,
+        initial=state_ids[tm.initial_state],
+        accepting=bytes(name in tm.accepting_states for name in states),
+        next_state=next_state,
+        write=write,
+        move=move,
+        sweeps=find_sweeps(len(states), len(symbols), next_state, write, move),
+        runaway=runaway,
+    )
+
+
+def find_sweeps(n_states, width, next_state, write, move):
+    # a state whose self-loops all move the same way scans over any run of
+    # those symbols, so the engine can cross the whole run as one operation
+    sweeps = [None] * n_states
+    for state in range(n_states):
+        loops = {}
+        for symbol in range(width):
+            i = state * width + symbol
+            if next_state[i] == state:
+                loops[symbol] = (write[i], move[i])
+        directions = {direction for _, direction in loops.values()}
+        if directions not in ({1}, {-1}):
+            continue
+        table = None
+        if any(new != symbol for symbol, (new, _) in loops.items()):
+            table = bytes(loops[a][0] if a in loops else a for a in range(256))
+        sweeps[state] = (directions.pop(), bytes(sorted(loops)), table)
+    return sweeps
+
+
+@dataclass
+class CompiledMultiTape:
+    states: list[str]
+    symbols: list[str]
+    blank: int
+    initial: int
+    accepting: bytes
+    tapes: int
+    # next_state is indexed by state * len(symbols) ** tapes plus the symbols
+    # read as base len(symbols) digits, tape 0 first; write and move hold
+    # one entry per tape at index * tapes + tape
+    next_state: array
+    write: array
+    move: array
+    state_ids: dict[str, int] = field(init=False, repr=False)
+    symbol_ids: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.state_ids = {name: i for i, name in enumerate(self.states)}
+        self.symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+
+
+def compile_multitape(tm, extra_symbols=()):
+    states, symbols, state_ids, symbol_ids = number_names(
+        tm, [*(s for s, _ in tm.transitions), *(s for s, _, _ in tm.transitions.values())],
+        [*(a for _, reads in tm.transitions for a in reads),
+         *(a for _, writes, _ in tm.transitions.values() for a in writes)],
+        extra_symbols)
+
+    k = tm.tapes
+    stride = len(symbols) ** k
+    size = len(states) * stride
+    if size > 1 << 24:
+        raise ValueError(f'{len(states)} states over {len(symbols)} symbols on {k} tapes '
+                         'is too large a table')
+    next_state = array('i', [-1]) * size
+    write = array('i', [0]) * (size * k)
+    move = array('b', [0]) * (size * k)
+    for (state, reads), (new_state, writes, moves) in tm.transitions.items():
+        i = state_ids[state]
+        for symbol in reads:
+            i = i * len(symbols) + symbol_ids[symbol]
+        next_state[i] = state_ids[new_state]
+        for t in range(k):
+            write[i * k + t] = symbol_ids[writes[t]]
+            move[i * k + t] = moves[t]
+
+    return CompiledMultiTape(
+        states=states,
+        symbols=symbols,
+        blank=symbol_ids[tm.blank_symbol],
+        initial=state_ids[tm.initial_state],
+        accepting=bytes(name in tm.accepting_states for name in states),
+        tapes=k,
+        next_state=next_state,
+        write=write,
+        move=move,
+    )
+
+
+@dataclass
+class CompiledChoices:
+    states: list[str]
+    symbols: list[str]
+    blank: int
+    initial: int
+    accepting: bytes
+    # the actions for table index state * len(symbols) + symbol are
+    # next_state, write and move[first[index]:first[index + 1]]
+    first: array
+    next_state: array
+    write: array
+    move: array
+    state_ids: dict[str, int] = field(init=False, repr=False)
+    symbol_ids: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.state_ids = {name: i for i, name in enumerate(self.states)}
+        self.symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+
+
+def compile_choices(tm, extra_symbols=()):
+    actions = [action for choices in tm.transitions.values() for action in choices]
+    states, symbols, state_ids, symbol_ids = number_names(
+        tm, [*(s for s, _ in tm.transitions), *(s for s, _, _ in actions)],
+        [*(a for _, a in tm.transitions), *(a for _, a, _ in actions)], extra_symbols)
+
+    size = len(states) * len(symbols)
+    table = [()] * size
+    for (state, symbol), choices in tm.transitions.items():
+        table[state_ids[state] * len(symbols) + symbol_ids[symbol]] = choices
+    first = array('i', [0])
+    next_state = array('i')
+    write = array('i')
+    move = array('b')
+    for choices in table:
+        for new_state, new_symbol, direction in choices:
+            next_state.append(state_ids[new_state])
+            write.append(symbol_ids[new_symbol])
+            move.append(direction)
+        first.append(len(next_state))
+
+    return CompiledChoices(
+        states=states,
+        symbols=symbols,
+        blank=symbol_ids[tm.blank_symbol],
+        initial=state_ids[tm.initial_state],
+        accepting=bytes(name in tm.accepting_states for name in states),
+        first=first,
+        next_state=next_state,
+        write=write,
+        move=move,
+    )
+
+
+SAME_BYTES = re.compile(rb'(.)\1*', re.DOTALL)
+
+
+def binary_digits(tape):
+    # translate table for a tape's cells: 0 and 1 to their digits, blank to a
+    # space so words split apart, anything else to x, which int() rejects
+    table = bytearray(b'x' * 256)
+    table[tape.blank] = ord(' ')
+    for digit in '01':
+        if digit in tape.symbol_ids:
+            table[tape.symbol_ids[digit]] = ord(digit)
+    return bytes(table)
+
+
+class TapeFull(MemoryError):
+    def __init__(self, steps=0):
+        super().__init__('Tape size limit reached')
+        self.steps = steps
+
+
+class Tape:
+    # one symbol id per byte, cells[origin] is tape position 0
+    def __init__(self, symbols, blank, cells=b'', origin=0):
+        self.symbols = symbols
+        self.symbol_ids = {name: i for i, name in enumerate(symbols)}
+        self.blank = blank
+        self.cells = bytearray(cells)
+        self.origin = origin
+        self.limit = None
+
+    @classmethod
+    def from_symbols(cls, symbols, blank, input_symbols):
+        tape = cls(symbols, blank)
+        for pos, name in input_symbols.items():
+            tape[pos] = name
+        return tape
+
+    def __len__(self):
+        return len(self.cells)
+
+    def index(self, pos):
+        i = pos + self.origin
+        size = len(self.cells)
+        if i >= size:
+            grow = self._growth(i - size + 1)
+            self.cells.extend(bytes([self.blank]) * grow)
+        elif i < 0:
+            grow = self._growth(-i)
+            self.cells[0:0] = bytes([self.blank]) * grow
+            self.origin += grow
+            i += grow
+        return i
+
+    def _growth(self, need):
+        # at least double, but never past limit cells
+        size = len(self.cells)
+        grow = max(need, size, 16)
+        if self.limit is not None:
+            if size + need > self.limit:
+                raise TapeFull
+            grow = min(grow, self.limit - size)
+        return grow
+
+    def run_length(self, i, direction, chars, limit=None):
+        # consecutive cells from index i (inclusive) whose symbols are in chars,
+        # never looking past the allocated cells
+        cells = self.cells
+        n, chunk = 0, 16
+        while limit is None or n < limit:
+            if limit is not None:
+                chunk = min(chunk, limit - n)
+            if direction > 0:
+                segment = cells[i + n:i + n + chunk]
+                rest = len(segment.lstrip(chars))
+            else:
+                segment = cells[max(i - n - chunk + 1, 0):i - n + 1]
+                rest = len(segment.rstrip(chars))
+            n += len(segment) - rest
+            if rest or len(segment) < chunk:
+                break
+            chunk *= 2
+        return n
+
+    def sweep(self, pos, direction, chars, table, limit=None):
+        # position-based run_length plus rewrite, for the generic engine loop
+        i = self.index(pos)
+        n = self.run_length(i, direction, chars, limit)
+        if table is not None:
+            lo = i if direction > 0 else i - n + 1
+            self.cells[lo:lo + n] = self.cells[lo:lo + n].translate(table)
+        return n
+
+    def translate(self, lo, hi, table):
+        lo, hi = self.index(lo), self.index(hi - 1) + 1
+        self.cells[lo:hi] = self.cells[lo:hi].translate(table)
+
+    def runs_in(self, lo, hi):
+        # (symbol, length) runs covering [lo, hi), left to right
+        segment = self.cells[self.index(lo):self.index(hi - 1) + 1]
+        return [(m.group()[0], m.end() - m.start()) for m in SAME_BYTES.finditer(segment)]
+
+    def counts(self, lo, hi, chars):
+        # how many of the cells in [lo, hi) hold each symbol in chars
+        segment = self.cells[self.index(lo):self.index(hi - 1) + 1]
+        return {a: segment.count(a) for a in chars}
+
+    def read(self, pos):
+        i = pos + self.origin
+        if 0 <= i < len(self.cells):
+            return self.cells[i]
+        return self.blank
+
+    def blank_beyond(self, pos, direction):
+        # whether every cell past pos in the given direction is blank
+        i = pos + self.origin
+        rest = self.cells[max(i + 1, 0):] if direction > 0 else self.cells[:max(i, 0)]
+        return not rest.strip(bytes([self.blank]))
+
+    def snapshot(self):
+        # (position of the first non-blank cell, the cells up to the last one)
+        blank = bytes([self.blank])
+        lead = len(self.cells) - len(self.cells.lstrip(blank))
+        return lead - self.origin, bytes(self.cells.strip(blank))
+
+    def write(self, pos, symbol):
+        self.cells[self.index(pos)] = symbol
+
+    def __getitem__(self, pos):
+        return self.symbols[self.read(pos)]
+
+    def __setitem__(self, pos, name):
+        self.write(pos, self.symbol_ids[name])
+
+    def count(self, name):
+        # cells holding symbol name, counted on the byte array itself
+        if name not in self.symbol_ids:
+            return 0
+        return self.cells.count(self.symbol_ids[name])
+
+    def segments(self):
+        # (start, stop) of every stretch of non-blank cells, left to right
+        pattern = re.compile(b'[^%s]+' % re.escape(bytes([self.blank])))
+        for m in pattern.finditer(self.cells):
+            yield m.start() - self.origin, m.end() - self.origin
+
+    def contents(self):
+        # tape between the leftmost and rightmost non-blank cells
+        used = self.cells.strip(bytes([self.blank]))
+        return ''.join(self.symbols[a] for a in used)
+
+    def binary(self):
+        # every stretch of non-blank cells read as a binary number
+        return [int(word, 2) for word in self.cells.translate(binary_digits(self)).split()]
+
+    def items(self):
+        for i, symbol in enumerate(self.cells):
+            yield i - self.origin, self.symbols[symbol]
+
+    def fork(self):
+        # an independent copy, O(cells)
+        tape = copy.copy(self)
+        tape.cells = bytearray(self.cells)
+        return tape
+
+
+class RunTape:
+    # (start, symbol) runs, run k covers starts[k] up to starts[k + 1];
+    # the first run reaches back to -inf and the last one on to +inf
+    def __init__(self, symbols, blank):
+        self.symbols = symbols
+        self.symbol_ids = {name: i for i, name in enumerate(symbols)}
+        self.blank = blank
+        self.starts = [-math.inf]
+        self.syms = [blank]
+        self.limit = None
+
+    @classmethod
+    def from_symbols(cls, symbols, blank, input_symbols):
+        tape = cls(symbols, blank)
+        end = None
+        for pos, name in sorted(input_symbols.items()):
+            if end is not None and pos != end:
+                tape._append(end, blank)
+            tape._append(pos, tape.symbol_ids[name])
+            end = pos + 1
+        if end is not None:
+            tape._append(end, blank)
+        return tape
+
+    def _append(self, start, symbol):
+        if symbol != self.syms[-1]:
+            self.starts.append(start)
+            self.syms.append(symbol)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _find(self, pos):
+        return bisect_right(self.starts, pos) - 1
+
+    def _end(self, k):
+        return self.starts[k + 1] if k + 1 < len(self.starts) else math.inf
+
+    def _split(self, pos):
+        # make a run start exactly at pos and return its index
+        k = self._find(pos)
+        if self.starts[k] != pos:
+            k += 1
+            self.starts.insert(k, pos)
+            self.syms.insert(k, self.syms[k - 1])
+        return k
+
+    def _merge(self, k):
+        # fold run k into run k - 1 when they hold the same symbol
+        if 0 < k < len(self.starts) and self.syms[k] == self.syms[k - 1]:
+            del self.starts[k]
+            del self.syms[k]
+
+    def read(self, pos):
+        return self.syms[self._find(pos)]
+
+    def blank_beyond(self, pos, direction):
+        k = self._find(pos)
+        return k == (len(self.starts) - 1 if direction > 0 else 0)
+
+    def snapshot(self):
+        return tuple(self.starts), tuple(self.syms)
+
+    def _reserve(self):
+        # a write or translate adds at most two runs before merging
+        if self.limit is not None and len(self.starts) + 2 > self.limit:
+            raise TapeFull
+
+    def write(self, pos, symbol):
+        if self.read(pos) == symbol:
+            return
+        self._reserve()
+        k = self._split(pos)
+        self._split(pos + 1)
+        self.syms[k] = symbol
+        self._merge(k + 1)
+        self._merge(k)
+
+    def translate(self, lo, hi, table):
+        self._reserve()
+        a = self._split(lo)
+        b = self._split(hi)
+        for k in range(a, b):
+            self.syms[k] = table[self.syms[k]]
+        for k in range(b, a - 1, -1):
+            self._merge(k)
+
+    def runs_in(self, lo, hi):
+        runs = []
+        k = self._find(lo)
+        while k < len(self.starts) and self.starts[k] < hi:
+            runs.append((self.syms[k], min(self._end(k), hi) - max(self.starts[k], lo)))
+            k += 1
+        return runs
+
+    def counts(self, lo, hi, chars):
+        counts = dict.fromkeys(chars, 0)
+        k = self._find(lo)
+        while k < len(self.starts) and self.starts[k] < hi:
+            if self.syms[k] in counts:
+                counts[self.syms[k]] += min(self._end(k), hi) - max(self.starts[k], lo)
+            k += 1
+        return counts
+
+    def sweep(self, pos, direction, chars, table, limit=None):
+        # cross the cells from pos whose symbols are in chars one run at a
+        # time, rewriting them through table, and return how many were crossed
+        if limit is None:
+            limit = 1 << 30
+        k = self._find(pos)
+        n = 0
+        while n < limit and self.syms[k] in chars:
+            if direction > 0:
+                n += self._end(k) - (pos + n)
+                k += 1
+            else:
+                n += (pos - n) - self.starts[k] + 1
+                k -= 1
+        n = min(n, limit)
+        if table is not None:
+            lo, hi = (pos, pos + n) if direction > 0 else (pos - n + 1, pos + 1)
+            self.translate(lo, hi, table)
+        return n
+
+    def __getitem__(self, pos):
+        return self.symbols[self.read(pos)]
+
+    def __setitem__(self, pos, name):
+        self.write(pos, self.symbol_ids[name])
+
+    def count(self, name):
+        if name not in self.symbol_ids:
+            return 0
+        symbol = self.symbol_ids[name]
+        return sum(self.starts[k + 1] - self.starts[k]
+                   for k in range(1, len(self.starts) - 1) if self.syms[k] == symbol)
+
+    def segments(self):
+        # neighbouring runs never share a symbol, so blank runs split the segments
+        start = None
+        for k in range(1, len(self.starts)):
+            if self.syms[k] == self.blank:
+                if start is not None:
+                    yield start, self.starts[k]
+                    start = None
+            elif start is None:
+                start = self.starts[k]
+
+    def contents(self):
+        # the outer runs are always the infinite blank ones
+        return ''.join(self.symbols[self.syms[k]] * (self.starts[k + 1] - self.starts[k])
+                       for k in range(1, len(self.starts) - 1))
+
+    def binary(self):
+        # each run expands straight to its digit bytes
+        table = binary_digits(self)
+        digits = bytearray()
+        for k in range(1, len(self.starts) - 1):
+            digits += table[self.syms[k]:self.syms[k] + 1] * (self.starts[k + 1] - self.starts[k])
+        return [int(word, 2) for word in digits.split()]
+
+    def items(self):
+        for k in range(1, len(self.starts) - 1):
+            for pos in range(self.starts[k], self.starts[k + 1]):
+                yield pos, self.symbols[self.syms[k]]
+
+    def fork(self):
+        # an independent copy, O(runs)
+        tape = copy.copy(self)
+        tape.starts, tape.syms = list(self.starts), list(self.syms)
+        return tape
+
+
+CHUNK_BITS = 10
+CHUNK = 1 << CHUNK_BITS
+
+
+class ChunkedTape:
+    # CHUNK-cell bytearrays by chunk number, position >> CHUNK_BITS; chunks
+    # never written are blank and not stored. fork() shares the chunks, and
+    # after it the first write copies the chunk table and each chunk is
+    # copied once when first written, so forks cost what they change
+    def __init__(self, symbols, blank):
+        self.symbols = symbols
+        self.symbol_ids = {name: i for i, name in enumerate(symbols)}
+        self.blank = blank
+        self.chunks = {}
+        # chunk numbers this tape copied since the last fork, and whether
+        # the chunk table itself is still shared
+        self.owned = set()
+        self.shared = False
+        self.limit = None
+
+    @classmethod
+    def from_symbols(cls, symbols, blank, input_symbols):
+        tape = cls(symbols, blank)
+        for pos, name in input_symbols.items():
+            tape[pos] = name
+        return tape
+
+    @classmethod
+    def from_cells(cls, symbols, blank, cells, origin=0):
+        # cells[origin] is position 0, as on a Tape
+        tape = cls(symbols, blank)
+        for pos in range(-origin & ~(CHUNK - 1), len(cells) - origin, CHUNK):
+            lo, hi = max(pos + origin, 0), min(pos + origin + CHUNK, len(cells))
+            chunk = bytearray([blank]) * CHUNK
+            chunk[lo - pos - origin:hi - pos - origin] = cells[lo:hi]
+            if chunk.strip(bytes([blank])):
+                tape.chunks[pos >> CHUNK_BITS] = chunk
+                tape.owned.add(pos >> CHUNK_BITS)
+        return tape
+
+    def __len__(self):
+        return len(self.chunks) * CHUNK
+
+    def fork(self):
+        # O(1), the two tapes share every chunk until one of them writes it
+        tape = copy.copy(self)
+        tape.owned, self.owned = set(), set()
+        tape.shared = self.shared = True
+        return tape
+
+    def _own(self, k):
+        # chunk k, copied first unless this tape already did since the fork
+        if self.shared:
+            self.chunks = dict(self.chunks)
+            self.shared = False
+        chunk = self.chunks.get(k)
+        if chunk is None:
+            # max_tape counts whole chunks, so it rounds up to a multiple of CHUNK
+            if self.limit is not None and len(self.chunks) * CHUNK >= self.limit:
+                raise TapeFull
+            chunk = bytearray([self.blank]) * CHUNK
+        else:
+            chunk = bytearray(chunk)
+        self.chunks[k] = chunk
+        self.owned.add(k)
+        return chunk
+
+    def read(self, pos):
+        chunk = self.chunks.get(pos >> CHUNK_BITS)
+        return self.blank if chunk is None else chunk[pos & (CHUNK - 1)]
+
+    def write(self, pos, symbol):
+        k = pos >> CHUNK_BITS
+        if k in self.owned:
+            self.chunks[k][pos & (CHUNK - 1)] = symbol
+        elif self.read(pos) != symbol:
+            self._own(k)[pos & (CHUNK - 1)] = symbol
+
+    def cells(self, lo, hi):
+        # the cells in [lo, hi) as bytes
+        blank = bytes([self.blank])
+        parts = []
+        for k in range(lo >> CHUNK_BITS, ((hi - 1) >> CHUNK_BITS) + 1):
+            a, b = max(lo, k << CHUNK_BITS), min(hi, (k + 1) << CHUNK_BITS)
+            chunk = self.chunks.get(k)
+            parts.append(blank * (b - a) if chunk is None
+                         else chunk[a - (k << CHUNK_BITS):b - (k << CHUNK_BITS)])
+        return b''.join(parts)
+
+    def flat(self):
+        # (position of the first cell, every cell of the stored chunks)
+        if not self.chunks:
+            return 0, b''
+        lo, hi = min(self.chunks) << CHUNK_BITS, (max(self.chunks) + 1) << CHUNK_BITS
+        return lo, self.cells(lo, hi)
+
+    def sweep(self, pos, direction, chars, table, limit=None):
+        # cross the cells from pos whose symbols are in chars, stopping at
+        # the end of pos's chunk, and rewrite them through table
+        k, i = pos >> CHUNK_BITS, pos & (CHUNK - 1)
+        chunk = self.chunks.get(k)
+        if chunk is None:
+            n = (CHUNK - i if direction > 0 else i + 1) if self.blank in chars else 0
+        elif direction > 0:
+            segment = chunk[i:]
+            n = len(segment) - len(segment.lstrip(chars))
+        else:
+            segment = chunk[:i + 1]
+            n = len(segment) - len(segment.rstrip(chars))
+        if limit is not None:
+            n = min(n, limit)
+        if table is not None and n:
+            lo = pos if direction > 0 else pos - n + 1
+            self.translate(lo, lo + n, table)
+        return n
+
+    def translate(self, lo, hi, table):
+        for k in range(lo >> CHUNK_BITS, ((hi - 1) >> CHUNK_BITS) + 1):
+            a = max(lo, k << CHUNK_BITS) - (k << CHUNK_BITS)
+            b = min(hi, (k + 1) << CHUNK_BITS) - (k << CHUNK_BITS)
+            chunk = self.chunks[k] if k in self.owned else self._own(k)
+            chunk[a:b] = chunk[a:b].translate(table)
+
+    def runs_in(self, lo, hi):
+        return [(m.group()[0], m.end() - m.start())
+                for m in SAME_BYTES.finditer(self.cells(lo, hi))]
+
+    def counts(self, lo, hi, chars):
+        segment = self.cells(lo, hi)
+        return {a: segment.count(a) for a in chars}
+
+    def blank_beyond(self, pos, direction):
+        blank = bytes([self.blank])
+        k, i = pos >> CHUNK_BITS, pos & (CHUNK - 1)
+        for n, chunk in self.chunks.items():
+            if n == k:
+                rest = chunk[i + 1:] if direction > 0 else chunk[:i]
+            elif (n - k) * direction > 0:
+                rest = chunk
+            else:
+                continue
+            if rest.strip(blank):
+                return False
+        return True
+
+    def snapshot(self):
+        blank = bytes([self.blank])
+        start, cells = self.flat()
+        lead = len(cells) - len(cells.lstrip(blank))
+        return start + lead, cells.strip(blank)
+
+    def __getitem__(self, pos):
+        return self.symbols[self.read(pos)]
+
+    def __setitem__(self, pos, name):
+        self.write(pos, self.symbol_ids[name])
+
+    def count(self, name):
+        if name not in self.symbol_ids:
+            return 0
+        symbol = self.symbol_ids[name]
+        return sum(chunk.count(symbol) for chunk in self.chunks.values())
+
+    def segments(self):
+        start, cells = self.flat()
+        pattern = re.compile(b'[^%s]+' % re.escape(bytes([self.blank])))
+        for m in pattern.finditer(cells):
+            yield m.start() + start, m.end() + start
+
+    def contents(self):
+        used = self.flat()[1].strip(bytes([self.blank]))
+        return ''.join(self.symbols[a] for a in used)
+
+    def binary(self):
+        return [int(word, 2) for word in self.flat()[1].translate(binary_digits(self)).split()]
+
+    def items(self):
+        start, cells = self.flat()
+        for i, symbol in enumerate(cells):
+            yield start + i, self.symbols[symbol]
+
+
+TAPES = {'bytes': Tape, 'runs': RunTape, 'chunks': ChunkedTape}
+CLOCK_STEPS = 1 << 16
+CHECKPOINT_MAGIC = b'TMCHKPT1'
+TRACE_MAGIC = b'TMTRACE1'
+LOOP_STEPS = 1 << 10
+
+
+class Outcome(Enum):
+    ACCEPT = 'accept'
+    REJECT = 'reject'
+    TIMEOUT = 'timeout'
+    OUT_OF_MEMORY = 'out of memory'
+    NON_HALTING = 'non-halting'
+
+
+@dataclass
+class RunResult:
+    outcome: Outcome
+    halted: bool
+    accepted: bool
+    steps: int
+    state: str
+    head: int
+    tape: str
+    value: object = None
+
+    @property
+    def verdict(self):
+        return self.outcome.value
+
+
+class LoopDetector:
+    # Looks at the machine between equally sized slices of steps. A run is
+    # non-halting once it (a) is in a state that rewrites blanks and keeps
+    # moving into an all-blank half of the tape, or (b) repeats a whole
+    # configuration, found with Brent's algorithm over the slice boundaries.
+    def __init__(self, tm):
+        self.tm = tm
+        self.saved = None
+        self.power = 1
+        self.length = 0
+
+    def configuration(self):
+        return self.tm.current_state, self.tm.head, self.tm.tape.snapshot()
+
+    def looping(self):
+        tm, c = self.tm, self.tm.compiled
+        direction = c.runaway[c.state_ids[tm.current_state]]
+        if (direction and tm.tape.read(tm.head) == c.blank
+                and tm.tape.blank_beyond(tm.head, direction)):
+            return True
+
+        if self.saved is not None and self.saved[:2] == (tm.current_state, tm.head):
+            if self.saved == self.configuration():
+                return True
+        self.length += 1
+        if self.saved is None or self.length == self.power:
+            self.saved = self.configuration()
+            self.power *= 2
+            self.length = 0
+        return False
+
+
+class Profile:
+    # filled in by run(profile=...) / step(profile=...); hits and time are
+    # keyed by compiled table index (state * symbols + symbol) and state id
+    def __init__(self):
+        self.compiled = None
+        self.hits = Counter()
+        self.state_ns = Counter()
+        self.travel = 0
+        self.lowest = None
+        self.highest = None
+        self.tape_peak = 0
+
+    def visit(self, head, tape_size):
+        if self.lowest is None or head < self.lowest:
+            self.lowest = head
+        if self.highest is None or head > self.highest:
+            self.highest = head
+        if tape_size > self.tape_peak:
+            self.tape_peak = tape_size
+
+    def transitions(self):
+        # ((state, symbol), hits) from most to least hit
+        c = self.compiled
+        width = len(c.symbols)
+        return [((c.states[i // width], c.symbols[i % width]), hits)
+                for i, hits in self.hits.most_common()]
+
+    def report(self):
+        c = self.compiled
+        total = sum(self.hits.values()) or 1
+        lines = [f'{"state":>10} {"symbol":>8} {"hits":>14} {"share":>7}']
+        for (state, symbol), hits in self.transitions():
+            lines.append(f'{state:>10} {symbol:>8} {hits:>14} {hits / total:>7.1%}')
+        lines.append('')
+        lines.append(f'{"state":>10} {"seconds":>12}')
+        for state, ns in self.state_ns.most_common():
+            lines.append(f'{c.states[state]:>10} {ns / 1e9:>12.6f}')
+        lines.append('')
+        lines.append(f'head travel {self.travel} cells over [{self.lowest}, {self.highest}], '
+                     f'tape peak {self.tape_peak}')
+        return '\n'.join(lines)
+
+    def folded(self):
+        # "state;symbol hits" lines, the input format of flamegraph.pl
+        return '\n'.join(f'{state};{symbol} {hits}'
+                         for (state, symbol), hits in self.transitions()) + '\n'
+
+
+MOVE_CODES = {-1: 0, 1: 1, 0: 2}
+MOVES = (-1, 1, 0)
+STATE_CHANGED = 4
+SWEEP = 8
+
+
+def put_varint(buffer, n):
+    while n > 0x7f:
+        buffer.append(n & 0x7f | 0x80)
+        n >>= 7
+    buffer.append(n)
+
+
+def get_varint(data, pos):
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class TraceWriter:
+    # run(sink=...) streams every step to path: the starting configuration
+    # (same layout as a checkpoint) and then one record per step or sweep.
+    # A record starts with a flag byte, the move code in the low two bits,
+    # STATE_CHANGED when a varint new state id follows and SWEEP for a macro
+    # sweep; a step is then read and write symbol ids, a sweep a varint run
+    # count and read, write, varint length for each run in the order crossed
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.file = None
+        self.state = None
+
+    def begin(self, tm):
+        if self.file is not None:
+            return
+        self.file = open(self.path, 'wb', buffering=self.buffer_size)
+        write_configuration(self.file, TRACE_MAGIC, tm)
+        self.state = tm.compiled.state_ids[tm.current_state]
+
+    def step(self, state, new_state, read, write, move):
+        buffer = self.buffer
+        if new_state != self.state:
+            buffer.append(MOVE_CODES[move] | STATE_CHANGED)
+            put_varint(buffer, new_state)
+            self.state = new_state
+        else:
+            buffer.append(MOVE_CODES[move])
+        buffer.append(read)
+        buffer.append(write)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def sweep(self, direction, runs, table):
+        buffer = self.buffer
+        buffer.append(MOVE_CODES[direction] | SWEEP)
+        put_varint(buffer, len(runs))
+        for symbol, n in runs:
+            buffer.append(symbol)
+            buffer.append(symbol if table is None else table[symbol])
+            put_varint(buffer, n)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    # reads a TraceWriter file without the machine definition; the records
+    # are mapped, not loaded, so long traces can be scanned or replayed
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.header, self.start = read_configuration(f, TRACE_MAGIC, 'trace', path)
+            self.offset = f.tell()
+            if os.fstat(f.fileno()).st_size > self.offset:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b''
+        self.states = self.header['states']
+        self.symbols = self.header['symbols']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def raw(self):
+        # (flag, state after, [(read, write, count), ...]) per record,
+        # a plain step being a single run of one cell
+        data, pos, end = self.data, self.offset, len(self.data)
+        state = self.states.index(self.header['state'])
+        while pos < end:
+            flag = data[pos]
+            pos += 1
+            if flag & STATE_CHANGED:
+                state, pos = get_varint(data, pos)
+            if flag & SWEEP:
+                count, pos = get_varint(data, pos)
+                runs = []
+                for _ in range(count):
+                    read, write = data[pos], data[pos + 1]
+                    n, pos = get_varint(data, pos + 2)
+                    runs.append((read, write, n))
+            else:
+                runs = [(data[pos], data[pos + 1], 1)]
+                pos += 2
+            yield flag, state, runs
+
+    def records(self):
+        # (step, state, head, read, write, move) for every step, sweeps expanded;
+        # state and head are before the step, the step numbers count on from
+        # the machine's total when the trace started
+        states, symbols = self.states, self.symbols
+        step, head = self.header['steps'], self.header['head']
+        state = states.index(self.header['state'])
+        for flag, new_state, runs in self.raw():
+            move = MOVES[flag & 3]
+            for read, write, n in runs:
+                for _ in range(n):
+                    yield step, states[state], head, symbols[read], symbols[write], move
+                    step += 1
+                    head += move
+            state = new_state
+
+    def __len__(self):
+        return sum(n for _, _, runs in self.raw() for _, _, n in runs)
+
+    def replay(self, step=None):
+        # (state, head, tape) after step total steps, or at the end of the trace
+        start = self.header['steps']
+        if step is not None and step < start:
+            raise ValueError(f'{self.path}: trace starts at step {start}')
+        state = self.header['state']
+        head = self.header['head']
+        tape = copy.deepcopy(self.start)
+        left = None if step is None else step - start
+        tables = {}
+        for flag, new_state, runs in self.raw():
+            if left == 0:
+                break
+            move = MOVES[flag & 3]
+            # a sweep never changes state, so stopping part way through one
+            # leaves state as it is
+            for read, write, n in runs:
+                if left is not None:
+                    n = min(n, left)
+                    left -= n
+                if read != write:
+                    if (read, write) not in tables:
+                        table = bytearray(range(256))
+                        table[read] = write
+                        tables[read, write] = bytes(table)
+                    lo = head if move > 0 else head - n + 1
+                    tape.translate(lo, lo + n, tables[read, write])
+                head += move * n
+                if left == 0:
+                    break
+            state = self.states[new_state]
+        if left:
+            raise ValueError(f'{self.path}: trace ends before step {step}')
+        return state, head, tape
+
+    def window(self, step=None, width=30):
+        # the cells around the head after step, head cell in brackets
+        state, head, tape = self.replay(step)
+        cells = [tape.symbols[tape.read(pos)] for pos in range(head - width, head + width + 1)]
+        cells[width] = f'[{cells[width]}]'
+        return f'{state}: ' + ' '.join(cells)
+
+
+def write_configuration(f, magic, tm):
+    # magic, JSON header length and header, then the tape cells as raw
+    # bytes (or the run starts and symbols), written straight from memory
+    tape = tm.tape
+    header = {
+        'fingerprint': tm.fingerprint(),
+        'states': tm.compiled.states,
+        'symbols': tape.symbols,
+        'blank': tape.blank,
+        'state': tm.current_state,
+        'head': tm.head,
+        'steps': tm.steps,
+        'halted': tm.halted,
+    }
+    if type(tape) is Tape:
+        header.update(tape='bytes', origin=tape.origin, size=len(tape.cells))
+        payload = [memoryview(tape.cells)]
+    elif type(tape) is ChunkedTape:
+        start, cells = tape.flat()
+        header.update(tape='chunks', origin=-start, size=len(cells))
+        payload = [cells]
+    else:
+        starts = array('q', tape.starts[1:])
+        header.update(tape='runs', size=len(starts), byteorder=sys.byteorder)
+        payload = [memoryview(starts), bytes(tape.syms[1:])]
+    encoded = json.dumps(header).encode()
+
+    f.write(magic)
+    f.write(struct.pack('<I', len(encoded)))
+    f.write(encoded)
+    for chunk in payload:
+        f.write(chunk)
+
+
+def read_configuration(f, magic, kind, path, tm=None):
+    # returns the header and the tape; with tm the fingerprint must match and
+    # symbol ids are mapped onto tm's compiled alphabet
+    if f.read(len(magic)) != magic:
+        raise ValueError(f'{path}: not a {kind}')
+    (length,) = struct.unpack('<I', f.read(4))
+    header = json.loads(f.read(length))
+    ids = list(range(len(header['symbols'])))
+    symbols, blank = header['symbols'], header['blank']
+    if tm is not None:
+        if header['fingerprint'] != tm.fingerprint():
+            raise ValueError(f'{path}: {kind} is for a different machine')
+        c = tm.compile(header['symbols'])
+        ids = [c.symbol_ids[name] for name in header['symbols']]
+        symbols, blank = c.symbols, c.blank
+    table = bytes(ids + list(range(len(ids), 256)))
+
+    if header['tape'] in ('bytes', 'chunks'):
+        tape = Tape(symbols, blank, origin=header['origin'])
+        tape.cells = bytearray(header['size'])
+        f.readinto(tape.cells)
+        if ids != list(range(len(ids))):
+            tape.cells = tape.cells.translate(table)
+        if header['tape'] == 'chunks':
+            tape = ChunkedTape.from_cells(symbols, blank, tape.cells, tape.origin)
+    else:
+        starts = array('q')
+        starts.frombytes(f.read(8 * header['size']))
+        if header['byteorder'] != sys.byteorder:
+            starts.byteswap()
+        tape = RunTape(symbols, blank)
+        tape.starts.extend(starts)
+        tape.syms.extend(table[a] for a in f.read(header['size']))
+    return header, tape
+
+
+class MachineBase:
+    # what the machine classes share; each says which compile function
+    # builds its table and how its transitions go into the fingerprint
+    def fingerprint(self):
+        # content hash of the definition, the same in every process
+        if self.digest is None:
+            definition = [sorted(self.states), sorted(self.symbols), self.blank_symbol,
+                          sorted(self.input_symbols), self.initial_state,
+                          sorted(self.accepting_states), *self.definition_rest()]
+            self.digest = hashlib.sha256(json.dumps(definition).encode()).hexdigest()
+        return self.digest
+
+    def compile(self, extra_symbols=()):
+        if self.compiled is not None:
+            missing = set(extra_symbols).difference(self.compiled.symbols)
+            if not missing:
+                return self.compiled
+            extra_symbols = {*missing, *self.compiled.symbols}
+        self.compiled = self.compile_table(extra_symbols)
+        return self.compiled
+
+    def accepted_input(self):
+        if not self.halted:
+            raise RuntimeError('Machine still running')
+        return self.current_state in self.accepting_states
+
+
+@dataclass
+class TuringMachine(MachineBase):
     states: set[str]
     symbols: set[str]
     blank_symbol: str
@@ -13,337 +1186,1434 @@ class TuringMachine:
     accepting_states: set[str]
     transitions: dict[tuple[str, str], tuple[str, str, int]]
     # state, symbol -> new state, new symbol, direction
+    glyphs: dict[str, str] = field(default_factory=lambda: GLYPHS)
 
     head: int = field(init=False)
-    tape: defaultdict[int, str] = field(init=False)
+    tape: Tape | RunTape | ChunkedTape = field(init=False)
     current_state: str = field(init=False)
     halted: bool = field(init=False, default=True)
+    steps: int = field(init=False, default=0)
+    compiled: CompiledMachine = field(init=False, default=None, repr=False)
+    digest: str = field(init=False, default=None, repr=False)
+    # tm -> answer read off the tape of an accepting run, see MACHINES
+    decoder: object = field(init=False, default=None, repr=False, compare=False)
+
+    compile_table = compile_machine
+
+    def definition_rest(self):
+        return [sorted([*key, *value] for key, value in self.transitions.items())]
 
-    def initialize(self, input_symbols):
+    def initialize(self, input_symbols, tape='bytes'):
+        # tape: 'bytes' for a flat bytearray, 'runs' for run-length encoded cells,
+        # 'chunks' for copy-on-write chunks that fork() cheaply
         self.head = 0
         self.halted = False
+        self.steps = 0
         self.current_state = self.initial_state
-        self.tape = defaultdict(lambda: "\033[31m⧈\033[0m", input_symbols)
+        c = self.compile(set(input_symbols.values()))
+        self.tape = TAPES[tape].from_symbols(c.symbols, c.blank, input_symbols)
 
-    def step(self):
+    def step(self, profile=None):
         if self.halted:
             raise RuntimeError('Cannot step halted machine')
 
-        try:
-            state, symbol, direction = self.transitions[(
-                self.current_state, self.tape[self.head])]
-        except KeyError:
+        c = self.compiled
+        state = c.state_ids[self.current_state]
+        i = state * len(c.symbols) + self.tape.read(self.head)
+        if c.next_state[i] < 0:
             self.halted = True
             return
-        self.tape[self.head] = symbol
-        self.current_state = state
-        self.head += direction
-
-    def accepted_input(self):
-        if not self.halted:
-            raise RuntimeError('Machine still running')
-        return self.current_state in self.accepting_states
+        if profile is not None:
+            started = time.perf_counter_ns()
+        self.tape.write(self.head, c.write[i])
+        self.current_state = c.states[c.next_state[i]]
+        self.head += c.move[i]
+        self.steps += 1
+        if profile is not None:
+            profile.compiled = c
+            profile.hits[i] += 1
+            profile.state_ns[state] += time.perf_counter_ns() - started
+            profile.travel += abs(c.move[i])
+            profile.visit(self.head, len(self.tape))
+
+    def run(self, max_steps=None, trace=None, max_seconds=None, max_tape=None,
+            detect_loops=False, checkpoint=None, checkpoint_steps=None,
+            checkpoint_seconds=None, profile=None, sink=None):
+        # trace: None runs silently, N prints every N steps, 'halt' prints once at the end;
+        # max_tape caps the tape size (cells for bytes and chunks tapes, runs for run tapes);
+        # detect_loops stops provably non-halting runs as NON_HALTING;
+        # checkpoint is a path rewritten every checkpoint_steps steps and/or
+        # checkpoint_seconds seconds, and once more when the run stops;
+        # profile is a Profile to fill in and sink a TraceWriter to record every
+        # step to, the plain loops never look at either
+        if isinstance(trace, int) and trace <= 0:
+            raise ValueError(f'trace must be a positive number of steps, not {trace}')
+        if checkpoint_steps is not None and checkpoint_steps <= 0:
+            raise ValueError(f'checkpoint_steps must be positive, not {checkpoint_steps}')
+        if self.halted:
+            raise RuntimeError('Cannot run halted machine')
+
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        saved_steps, saved_at = self.steps, time.monotonic()
+        # work in slices so the clock, the trace and the loop detector get a look in;
+        # a slice also ends where the next trace is due
+        slices = [size for size, wanted in (
+            (CLOCK_STEPS, deadline is not None or checkpoint_seconds is not None),
+            (LOOP_STEPS, detect_loops),
+            (checkpoint_steps, checkpoint is not None and checkpoint_steps is not None),
+        ) if wanted]
+        slice_steps = min(slices) if slices else None
+        loops = LoopDetector(self) if detect_loops else None
+        self.tape.limit = max_tape
+        outcome = None
+        steps = 0
+        untraced = 0
+        try:
+            while not self.halted:
+                if max_steps is not None and steps >= max_steps:
+                    outcome = Outcome.TIMEOUT
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    outcome = Outcome.TIMEOUT
+                    break
+                limit = None if max_steps is None else max_steps - steps
+                if slice_steps is not None:
+                    limit = slice_steps if limit is None else min(limit, slice_steps)
+                if isinstance(trace, int):
+                    limit = trace - untraced if limit is None else min(limit, trace - untraced)
+                try:
+                    if profile is None and sink is None:
+                        taken = self.advance(limit)
+                    else:
+                        taken = self.advance_observed(limit, profile, sink)
+                except TapeFull as error:
+                    steps += error.steps
+                    outcome = Outcome.OUT_OF_MEMORY
+                    break
+                steps += taken
+                if isinstance(trace, int):
+                    untraced += taken
+                    if untraced >= trace or self.halted:
+                        self.print()
+                        untraced = 0
+                if loops is not None and not self.halted and loops.looping():
+                    outcome = Outcome.NON_HALTING
+                    break
+                if checkpoint is not None and (
+                        checkpoint_steps is not None
+                        and self.steps - saved_steps >= checkpoint_steps
+                        or checkpoint_seconds is not None
+                        and time.monotonic() - saved_at >= checkpoint_seconds):
+                    self.checkpoint(checkpoint)
+                    saved_steps, saved_at = self.steps, time.monotonic()
+        finally:
+            self.tape.limit = None
+            if sink is not None:
+                sink.flush()
+        if checkpoint is not None:
+            self.checkpoint(checkpoint)
+        if trace == 'halt':
+            self.print()
+
+        accepted = self.halted and self.current_state in self.accepting_states
+        if outcome is None:
+            outcome = Outcome.ACCEPT if accepted else Outcome.REJECT
+        return RunResult(
+            outcome=outcome,
+            halted=self.halted,
+            accepted=accepted,
+            steps=steps,
+            state=self.current_state,
+            head=self.head,
+            tape=self.tape.contents(),
+            value=self.decoder(self) if self.decoder and accepted else None,
+        )
+
+    def advance(self, limit=None):
+        # runs at most limit steps on the compiled table, returns the number taken
+        if type(self.tape) is not Tape:
+            return self.advance_tape(limit)
+        c = self.compiled
+        next_state, write, move = c.next_state, c.write, c.move
+        sweeps = c.sweeps
+        width = len(c.symbols)
+        state = c.state_ids[self.current_state]
+        tape = self.tape
+        cells = tape.cells
+        pos = tape.index(self.head)
+        size = len(cells)
+        steps = 0
+        if limit is None:
+            limit = -1
+
+        full = False
+        try:
+            while steps != limit:
+                if not 0 <= pos < size:
+                    pos = tape.index(pos - tape.origin)
+                    size = len(cells)
+                i = state * width + cells[pos]
+                new_state = next_state[i]
+                if new_state < 0:
+                    self.halted = True
+                    break
+                if new_state == state and sweeps[state] is not None:
+                    direction, chars, table = sweeps[state]
+                    n = tape.run_length(pos, direction, chars,
+                                        None if limit < 0 else limit - steps)
+                    lo, hi = (pos, pos + n) if direction > 0 else (pos - n + 1, pos + 1)
+                    if table is not None:
+                        cells[lo:hi] = cells[lo:hi].translate(table)
+                    pos += direction * n
+                    steps += n
+                    continue
+                cells[pos] = write[i]
+                pos += move[i]
+                state = new_state
+                steps += 1
+        except TapeFull:
+            full = True
+
+        self.head = pos - tape.origin
+        self.current_state = c.states[state]
+        self.steps += steps
+        if full:
+            raise TapeFull(steps)
+        return steps
+
+    def advance_tape(self, limit=None):
+        # same as advance, through the tape's read/write/sweep methods
+        c = self.compiled
+        next_state, write, move = c.next_state, c.write, c.move
+        sweeps = c.sweeps
+        width = len(c.symbols)
+        state = c.state_ids[self.current_state]
+        read, write_cell, sweep = self.tape.read, self.tape.write, self.tape.sweep
+        head = self.head
+        steps = 0
+        if limit is None:
+            limit = -1
+
+        full = False
+        try:
+            while steps != limit:
+                i = state * width + read(head)
+                new_state = next_state[i]
+                if new_state < 0:
+                    self.halted = True
+                    break
+                if new_state == state and sweeps[state] is not None:
+                    direction, chars, table = sweeps[state]
+                    n = sweep(head, direction, chars, table,
+                              None if limit < 0 else limit - steps)
+                    head += direction * n
+                    steps += n
+                    continue
+                write_cell(head, write[i])
+                head += move[i]
+                state = new_state
+                steps += 1
+        except TapeFull:
+            full = True
+
+        self.head = head
+        self.current_state = c.states[state]
+        self.steps += steps
+        if full:
+            raise TapeFull(steps)
+        return steps
+
+    def advance_observed(self, limit=None, profile=None, sink=None):
+        # advance_tape with every transition counted and timed into profile
+        # and/or recorded to a TraceWriter sink; a step is recorded only once
+        # its write has fit under max_tape, so the trace stops where the machine did
+        c = self.compiled
+        next_state, write, move = c.next_state, c.write, c.move
+        sweeps = c.sweeps
+        width = len(c.symbols)
+        state = c.state_ids[self.current_state]
+        tape = self.tape
+        clock = time.perf_counter_ns
+        if profile is not None:
+            profile.compiled = c
+        if sink is not None:
+            sink.begin(self)
+        head = self.head
+        steps = 0
+        if limit is None:
+            limit = -1
+
+        full = False
+        try:
+            while steps != limit:
+                if profile is not None:
+                    started = clock()
+                i = state * width + tape.read(head)
+                new_state = next_state[i]
+                if new_state < 0:
+                    self.halted = True
+                    break
+                if new_state == state and sweeps[state] is not None:
+                    direction, chars, table = sweeps[state]
+                    n = tape.sweep(head, direction, chars, None,
+                                   None if limit < 0 else limit - steps)
+                    lo, hi = (head, head + n) if direction > 0 else (head - n + 1, head + 1)
+                    if profile is not None:
+                        for symbol, count in tape.counts(lo, hi, chars).items():
+                            if count:
+                                profile.hits[state * width + symbol] += count
+                        profile.travel += n
+                    if sink is not None:
+                        runs = tape.runs_in(lo, hi)
+                    if table is not None:
+                        tape.translate(lo, hi, table)
+                    if sink is not None:
+                        sink.sweep(direction, runs if direction > 0 else runs[::-1], table)
+                    head += direction * n
+                    steps += n
+                else:
+                    tape.write(head, write[i])
+                    if sink is not None:
+                        sink.step(state, new_state, i % width, write[i], move[i])
+                    head += move[i]
+                    steps += 1
+                    if profile is not None:
+                        profile.hits[i] += 1
+                        profile.travel += abs(move[i])
+                if profile is not None:
+                    profile.state_ns[state] += clock() - started
+                    profile.visit(head, len(tape))
+                state = new_state
+        except TapeFull:
+            full = True
+
+        self.head = head
+        self.current_state = c.states[state]
+        self.steps += steps
+        if full:
+            raise TapeFull(steps)
+        return steps
+
+    def checkpoint(self, path):
+        partial = f'{path}.{os.getpid()}'
+        with open(partial, 'wb') as f:
+            write_configuration(f, CHECKPOINT_MAGIC, self)
+        os.replace(partial, path)
+
+    def resume(self, path, tape=None):
+        # continue from a checkpoint written by this machine definition;
+        # tape converts it to another kind, e.g. 'chunks' to fork from
+        with open(path, 'rb') as f:
+            self.restore(f, path, tape)
+
+    def restore(self, f, path='<checkpoint>', tape=None):
+        # resume from a checkpoint in an open binary file
+        header, saved = read_configuration(f, CHECKPOINT_MAGIC, 'checkpoint', path, self)
+        if tape is not None and tape != header['tape']:
+            blank = saved.symbols[saved.blank]
+            saved = TAPES[tape].from_symbols(saved.symbols, saved.blank, {
+                pos: name for pos, name in saved.items() if name != blank})
+        self.tape = saved
+        self.current_state = header['state']
+        self.head = header['head']
+        self.steps = header['steps']
+        self.halted = header['halted']
+
+    def fork(self):
+        # a copy of the machine as it stands that runs on independently; O(1)
+        # on a 'chunks' tape, where the two share cells until they write them
+        twin = copy.copy(self)
+        twin.tape = self.tape.fork()
+        return twin
 
     def print(self, window=30):
         print(f'{" " * (2 * window + 4)}\033[1;33m⮯\033[0m')
         print('\033[34m... \033[0m', end='')
-        print("\033[1;32m ".join(self.tape[i] for i in range(
-            self.head - window, self.head + window+12)), end=''"\033[0m")
+        glyph = self.glyphs.get
+        cells = (self.tape[i] for i in range(
+            self.head - window, self.head + window+12))
+        print("\033[1;32m ".join(glyph(a, a) for a in cells), end=''"\033[0m")
         print(f'\033[1;34m >>> ( {self.current_state} )\033[0m\n')
 
 
-def split(word):
-    return [char for char in word]
+@dataclass
+class MultiTapeTuringMachine(MachineBase):
+    states: set[str]
+    symbols: set[str]
+    blank_symbol: str
+    input_symbols: set[str]
+    initial_state: str
+    accepting_states: set[str]
+    tapes: int
+    transitions: dict[tuple[str, tuple[str, ...]], tuple[str, tuple[str, ...], tuple[int, ...]]]
+    # state, symbols under the heads -> new state, new symbols, directions (-1, 0, 1)
+    glyphs: dict[str, str] = field(default_factory=lambda: GLYPHS)
+
+    # one head and one tape per tape number; the input goes on tape 0
+    head: list[int] = field(init=False)
+    tape: list = field(init=False)
+    current_state: str = field(init=False)
+    halted: bool = field(init=False, default=True)
+    steps: int = field(init=False, default=0)
+    compiled: CompiledMultiTape = field(init=False, default=None, repr=False)
+    digest: str = field(init=False, default=None, repr=False)
+    decoder: object = field(init=False, default=None, repr=False, compare=False)
 
+    compile_table = compile_multitape
 
-def addition():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol="\033[31m⧈\033[0m",
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('A', '1'): ('A', '1', 1),
-        ('A', '+'): ('B', '1', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', "\033[31m⧈\033[0m"): ('C', "\033[31m⧈\033[0m", -1),
-        ('C', '1'): ('D', "\033[31m⧈\033[0m", -1),
-        ('D', '1'): ('D', '1', -1),
-        ('D', "\033[31m⧈\033[0m"): ('Accept', "\033[31m⧈\033[0m", 1),
-    })
+    def definition_rest(self):
+        return [self.tapes,
+                sorted([*key, *value] for key, value in self.transitions.items())]
 
-    num1 = int(input("Enter number: "))
-    num2 = int(input("Enter number: "))
+    def initialize(self, input_symbols, tape='bytes'):
+        self.head = [0] * self.tapes
+        self.halted = False
+        self.steps = 0
+        self.current_state = self.initial_state
+        c = self.compile(set(input_symbols.values()))
+        self.tape = [TAPES[tape].from_symbols(c.symbols, c.blank, input_symbols if t == 0 else {})
+                     for t in range(self.tapes)]
 
-    str1 = ("1"*num1)+"+"
-    str2 = ("1"*num2)
+    def step(self):
+        if self.halted:
+            raise RuntimeError('Cannot step halted machine')
+        self.advance(1)
+
+    def run(self, max_steps=None, trace=None, max_seconds=None, max_tape=None,
+            detect_loops=False, profile=None, sink=None):
+        # the budgets of TuringMachine.run; max_tape caps every tape on its own.
+        # Loop detection, profiles and traces are single-tape only
+        if detect_loops or profile is not None or sink is not None:
+            raise ValueError('loop detection, profiling and trace files need a single-tape machine')
+        if isinstance(trace, int) and trace <= 0:
+            raise ValueError(f'trace must be a positive number of steps, not {trace}')
+        if self.halted:
+            raise RuntimeError('Cannot run halted machine')
+
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        slice_steps = CLOCK_STEPS if deadline is not None else None
+        for tape in self.tape:
+            tape.limit = max_tape
+        outcome = None
+        steps = 0
+        untraced = 0
+        try:
+            while not self.halted:
+                if max_steps is not None and steps >= max_steps:
+                    outcome = Outcome.TIMEOUT
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    outcome = Outcome.TIMEOUT
+                    break
+                limit = None if max_steps is None else max_steps - steps
+                if slice_steps is not None:
+                    limit = slice_steps if limit is None else min(limit, slice_steps)
+                if isinstance(trace, int):
+                    limit = trace - untraced if limit is None else min(limit, trace - untraced)
+                try:
+                    taken = self.advance(limit)
+                except TapeFull as error:
+                    steps += error.steps
+                    outcome = Outcome.OUT_OF_MEMORY
+                    break
+                steps += taken
+                if isinstance(trace, int):
+                    untraced += taken
+                    if untraced >= trace or self.halted:
+                        self.print()
+                        untraced = 0
+        finally:
+            for tape in self.tape:
+                tape.limit = None
+        if trace == 'halt':
+            self.print()
+
+        accepted = self.halted and self.current_state in self.accepting_states
+        if outcome is None:
+            outcome = Outcome.ACCEPT if accepted else Outcome.REJECT
+        return RunResult(
+            outcome=outcome,
+            halted=self.halted,
+            accepted=accepted,
+            steps=steps,
+            state=self.current_state,
+            head=tuple(self.head),
+            tape=tuple(tape.contents() for tape in self.tape),
+            value=self.decoder(self) if self.decoder and accepted else None,
+        )
+
+    def advance(self, limit=None):
+        # runs at most limit steps on the compiled table, returns the number taken
+        c = self.compiled
+        next_state, write, move = c.next_state, c.write, c.move
+        width = len(c.symbols)
+        k = c.tapes
+        tapes = self.tape
+        heads = self.head
+        state = c.state_ids[self.current_state]
+        if k == 2:
+            # the common case without the inner loops
+            read0, read1 = tapes[0].read, tapes[1].read
+            write0, write1 = tapes[0].write, tapes[1].write
+        rng = range(k)
+        steps = 0
+        if limit is None:
+            limit = -1
+
+        full = False
+        try:
+            while steps != limit:
+                if k == 2:
+                    i = (state * width + read0(heads[0])) * width + read1(heads[1])
+                    new_state = next_state[i]
+                    if new_state < 0:
+                        self.halted = True
+                        break
+                    i *= 2
+                    write0(heads[0], write[i])
+                    write1(heads[1], write[i + 1])
+                    heads[0] += move[i]
+                    heads[1] += move[i + 1]
+                else:
+                    i = state
+                    for t in rng:
+                        i = i * width + tapes[t].read(heads[t])
+                    new_state = next_state[i]
+                    if new_state < 0:
+                        self.halted = True
+                        break
+                    i *= k
+                    for t in rng:
+                        tapes[t].write(heads[t], write[i + t])
+                        heads[t] += move[i + t]
+                state = new_state
+                steps += 1
+        except TapeFull:
+            full = True
+
+        self.current_state = c.states[state]
+        self.steps += steps
+        if full:
+            raise TapeFull(steps)
+        return steps
 
-    unaryinput = str1+str2
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
+    def print(self, window=30):
+        glyph = self.glyphs.get
+        for t, (tape, head) in enumerate(zip(self.tape, self.head)):
+            cells = (tape[i] for i in range(head - window, head + window + 1))
+            print(f'\033[34m{t}: \033[0m', end='')
+            print(" ".join(f'\033[1;33m[{glyph(a, a)}]\033[0m' if n == window
+                           else f'\033[1;32m{glyph(a, a)}\033[0m'
+                           for n, a in enumerate(cells)))
+        print(f'\033[1;34m >>> ( {self.current_state} )\033[0m\n')
 
-    tm.initialize(res)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
+# A NondeterministicTuringMachine configuration is a (state, head, origin,
+# chunks, fingerprint) tuple. The tape is a tuple of CHOICE_CHUNK-cell byte
+# chunks, the first starting at position origin. A write replaces one chunk,
+# so branches share every chunk neither has written, and blank padding is one
+# shared chunk. The fingerprint xors a 64-bit key per non-blank cell and is
+# updated on every write, so seen sets hold (state, head, fingerprint), not tapes
+CHOICE_CHUNK = 64
+PARALLEL_FRONTIER = 1 << 12
+MASK64 = (1 << 64) - 1
+
+
+def cell_key(pos, symbol):
+    # splitmix64 of the cell
+    z = (pos * 256 + symbol + 0x9E3779B97F4A7C15) & MASK64
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & MASK64
+    return z ^ (z >> 31)
+
+
+def successors(c, configuration, blank_chunk):
+    # every configuration one step on, none if it halts
+    state, head, origin, chunks, fp = configuration
+    k, offset = divmod(head - origin, CHOICE_CHUNK)
+    read = chunks[k][offset] if 0 <= k < len(chunks) else c.blank
+    i = state * len(c.symbols) + read
+    found = []
+    for j in range(c.first[i], c.first[i + 1]):
+        new = c.write[j]
+        new_origin, new_chunks, new_fp, at = origin, chunks, fp, k
+        if new != read:
+            if at < 0:
+                new_chunks = (blank_chunk,) * -at + chunks
+                new_origin += at * CHOICE_CHUNK
+                at = 0
+            elif at >= len(chunks):
+                new_chunks = chunks + (blank_chunk,) * (at - len(chunks) + 1)
+            cells = bytearray(new_chunks[at])
+            cells[offset] = new
+            new_chunks = new_chunks[:at] + (bytes(cells),) + new_chunks[at + 1:]
+            if read != c.blank:
+                new_fp ^= cell_key(head, read)
+            if new != c.blank:
+                new_fp ^= cell_key(head, new)
+        found.append((c.next_state[j], head + c.move[j], new_origin, new_chunks, new_fp))
+    return found
 
 
-def subtraction():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol='\033[31m⧈\033[0m',
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('A', '1'): ('B', '\033[31m⧈\033[0m', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', '-'): ('B', '-', 1),
-        ('B', '\033[31m⧈\033[0m'): ('C', '\033[31m⧈\033[0m', -1),
-        ('C', '1'): ('D', '\033[31m⧈\033[0m', -1),
-        ('C', '-'): ('E', '1', -1),
-        ('D', '-'): ('D', '-', -1),
-        ('D', '1'): ('D', '1', -1),
-        ('D', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-        ('E', '1'): ('E', '1', -1),
-        ('E', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-    })
+@dataclass
+class NondeterministicTuringMachine(MachineBase):
+    states: set[str]
+    symbols: set[str]
+    blank_symbol: str
+    input_symbols: set[str]
+    initial_state: str
+    accepting_states: set[str]
+    transitions: dict[tuple[str, str], tuple[tuple[str, str, int], ...]]
+    # state, symbol -> every (new state, new symbol, direction) the machine may take
+    glyphs: dict[str, str] = field(default_factory=lambda: GLYPHS)
 
-    num1 = int(input("Enter number: "))
-    num2 = int(input("Enter number: "))
-    mx = max(num1, num2)
-    mn = min(num1, num2)
+    # the configuration run() settled on: the accepting one if there is one
+    head: int = field(init=False)
+    tape: Tape = field(init=False)
+    current_state: str = field(init=False)
+    halted: bool = field(init=False, default=True)
+    steps: int = field(init=False, default=0)
+    compiled: CompiledChoices = field(init=False, default=None, repr=False)
+    digest: str = field(init=False, default=None, repr=False)
+    decoder: object = field(init=False, default=None, repr=False, compare=False)
+    start: tuple = field(init=False, default=None, repr=False)
+    # search statistics of the last run
+    explored: int = field(init=False, default=0)
+    duplicates: int = field(init=False, default=0)
+    peak_frontier: int = field(init=False, default=0)
+
+    compile_table = compile_choices
+
+    def definition_rest(self):
+        return [sorted([*key, sorted(map(list, value))]
+                       for key, value in self.transitions.items())]
+
+    def initialize(self, input_symbols, tape='bytes'):
+        # configurations always keep their tape in shared chunks, tape is ignored
+        c = self.compile(set(input_symbols.values()))
+        flat = Tape.from_symbols(c.symbols, c.blank, input_symbols)
+        cells = bytes(flat.cells) + bytes([c.blank]) * (-len(flat) % CHOICE_CHUNK)
+        fp = 0
+        for pos, a in input_symbols.items():
+            if a != self.blank_symbol:
+                fp ^= cell_key(pos, c.symbol_ids[a])
+        self.start = (c.initial, 0, -flat.origin,
+                      tuple(cells[n:n + CHOICE_CHUNK] for n in range(0, len(cells), CHOICE_CHUNK)),
+                      fp)
+        self.settle(self.start, 0)
+        self.halted = False
+
+    def settle(self, configuration, depth):
+        c = self.compiled
+        state, head, origin, chunks, _ = configuration
+        self.current_state = c.states[state]
+        self.head = head
+        self.tape = Tape(c.symbols, c.blank, b''.join(chunks), -origin)
+        self.steps = depth
+
+    def run(self, max_steps=None, trace=None, max_seconds=None, max_tape=None,
+            detect_loops=False, profile=None, sink=None, search='bfs',
+            max_configurations=None, workers=None):
+        # searches the configurations reachable from initialize() for one that
+        # halts in an accepting state. bfs finds the shortest accepting run;
+        # dfs keeps less in memory and goes at most max_steps deep. Both skip
+        # configurations already seen (dfs: seen at no greater depth).
+        # max_tape caps each branch's tape, max_configurations the seen set;
+        # workers expands large bfs frontiers in that many processes. trace N
+        # prints the frontier every N levels. Each run searches from the start
+        if detect_loops or profile is not None or sink is not None:
+            raise ValueError('loop detection, profiling and trace files need a '
+                             'deterministic machine')
+        if search not in ('bfs', 'dfs'):
+            raise ValueError(f'search must be "bfs" or "dfs", not {search!r}')
+        if isinstance(trace, int) and trace <= 0:
+            raise ValueError(f'trace must be a positive number of levels, not {trace}')
+        if self.halted:
+            raise RuntimeError('Cannot run halted machine')
+
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        self.explored = self.duplicates = self.peak_frontier = 0
+        if search == 'bfs':
+            outcome, configuration, depth = self.breadth_first(
+                max_steps, deadline, max_tape, max_configurations, trace, workers)
+        else:
+            outcome, configuration, depth = self.depth_first(
+                max_steps, deadline, max_tape, max_configurations)
+        self.settle(configuration, depth)
+        self.halted = outcome in (Outcome.ACCEPT, Outcome.REJECT)
+        if trace == 'halt':
+            self.print()
+
+        return RunResult(
+            outcome=outcome,
+            halted=self.halted,
+            accepted=outcome is Outcome.ACCEPT,
+            steps=depth,
+            state=self.current_state,
+            head=self.head,
+            tape=self.tape.contents(),
+            value=self.decoder(self) if self.decoder and outcome is Outcome.ACCEPT else None,
+        )
+
+    def breadth_first(self, max_steps, deadline, max_tape, max_configurations, trace, workers):
+        c = self.compiled
+        blank_chunk = bytes([c.blank]) * CHOICE_CHUNK
+        start = self.start
+        seen = {(start[0], start[1], start[4])}
+        frontier = [start]
+        halted = None
+        full = False
+        depth = 0
+        pool = None
+        if workers:
+            pool = ProcessPoolExecutor(workers, initializer=start_worker, initargs=(self, 'bytes'))
+        try:
+            while frontier:
+                if isinstance(trace, int) and depth % trace == 0:
+                    print(f'depth {depth}: {len(frontier)} in the frontier, {len(seen)} seen')
+                if max_steps is not None and depth >= max_steps:
+                    return Outcome.TIMEOUT, frontier[0], depth
+                if pool is not None and len(frontier) >= PARALLEL_FRONTIER:
+                    # configurations in one chunk keep their shared chunks when pickled
+                    size = -(-len(frontier) // (4 * workers))
+                    expanded = (found for part in pool.map(expand_chunk, chunked(frontier, size))
+                                for found in part)
+                else:
+                    expanded = (successors(c, configuration, blank_chunk)
+                                for configuration in frontier)
+                following = []
+                for configuration, found in zip(frontier, expanded):
+                    self.explored += 1
+                    if (deadline is not None and self.explored % 4096 == 0
+                            and time.monotonic() >= deadline):
+                        return Outcome.TIMEOUT, configuration, depth
+                    if not found:
+                        if c.accepting[configuration[0]]:
+                            return Outcome.ACCEPT, configuration, depth
+                        halted = configuration, depth
+                    for new in found:
+                        key = (new[0], new[1], new[4])
+                        if key in seen:
+                            self.duplicates += 1
+                        elif (max_tape is not None and len(new[3]) * CHOICE_CHUNK > max_tape
+                                or max_configurations is not None
+                                and len(seen) >= max_configurations):
+                            full = True
+                        else:
+                            seen.add(key)
+                            following.append(new)
+                frontier = following
+                depth += 1
+                self.peak_frontier = max(self.peak_frontier, len(frontier))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return self.exhausted(halted, full)
+
+    def depth_first(self, max_steps, deadline, max_tape, max_configurations):
+        c = self.compiled
+        blank_chunk = bytes([c.blank]) * CHOICE_CHUNK
+        start = self.start
+        seen = {(start[0], start[1], start[4]): 0}
+        stack = [(start, 0)]
+        halted = None
+        full = cut = False
+        while stack:
+            configuration, depth = stack.pop()
+            self.explored += 1
+            if (deadline is not None and self.explored % 4096 == 0
+                    and time.monotonic() >= deadline):
+                return Outcome.TIMEOUT, configuration, depth
+            found = successors(c, configuration, blank_chunk)
+            if not found:
+                if c.accepting[configuration[0]]:
+                    return Outcome.ACCEPT, configuration, depth
+                halted = configuration, depth
+            elif max_steps is not None and depth >= max_steps:
+                cut = True
+                continue
+            for new in reversed(found):
+                key = (new[0], new[1], new[4])
+                if seen.get(key, depth + 2) <= depth + 1:
+                    self.duplicates += 1
+                elif (max_tape is not None and len(new[3]) * CHOICE_CHUNK > max_tape
+                        or max_configurations is not None and len(seen) >= max_configurations):
+                    full = True
+                else:
+                    seen[key] = depth + 1
+                    stack.append((new, depth + 1))
+            self.peak_frontier = max(self.peak_frontier, len(stack))
+        if cut:
+            return Outcome.TIMEOUT, *(halted or (start, 0))
+        return self.exhausted(halted, full)
+
+    def exhausted(self, halted, full):
+        # every branch was followed and none accepted: a rejecting halt if
+        # some branch halted, otherwise every branch loops
+        if full:
+            return Outcome.OUT_OF_MEMORY, *(halted or (self.start, 0))
+        if halted is not None:
+            return Outcome.REJECT, *halted
+        return Outcome.NON_HALTING, self.start, 0
+
+    print = TuringMachine.print
+
+
+MACHINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'machines')
+CACHE_DIR = os.environ.get('TURING_MACHINE_CACHE',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'turing_machine'))
+# bump whenever CompiledMachine changes so stale cache entries are ignored
+CACHE_VERSION = 2
+# machine and compiled table classes by the name cache entries record
+MACHINE_CLASSES = {machine.__name__: (machine, compiled) for machine, compiled in (
+    (TuringMachine, CompiledMachine),
+    (MultiTapeTuringMachine, CompiledMultiTape),
+    (NondeterministicTuringMachine, CompiledChoices),
+)}
+
+
+def init_fields(obj):
+    return {f.name: getattr(obj, f.name) for f in fields(obj) if f.init}
+
+
+def machine_path(name):
+    if os.sep in name or name.endswith('.json'):
+        return name
+    return os.path.join(MACHINE_DIR, name + '.json')
+
+
+def fingerprint(source):
+    return hashlib.sha256(b'%d\0' % CACHE_VERSION + source).hexdigest()
+
+
+def parse_machine(source, path='<machine>'):
+    try:
+        data = json.loads(source)
+    except ValueError as error:
+        raise ValueError(f'{path}: not valid JSON ({error})') from None
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: expected a JSON object')
+
+    def strings(key, many):
+        if key not in data:
+            raise ValueError(f'{path}: missing "{key}"')
+        value = data[key]
+        if not many:
+            if not isinstance(value, str):
+                raise ValueError(f'{path}: "{key}" must be a string')
+            return value
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f'{path}: "{key}" must be a list of strings')
+        return set(value)
+
+    tapes = data.get('tapes')
+    if tapes is not None:
+        return parse_multitape(data, path, strings, tapes)
+    if data.get('nondeterministic'):
+        return parse_choices(data, path, strings)
+
+    transitions = {}
+    for n, entry in enumerate(data.get('transitions', ())):
+        if (not isinstance(entry, list) or len(entry) != 5
+                or not all(isinstance(v, str) for v in entry[:4])
+                or entry[4] not in (-1, 1)):
+            raise ValueError(f'{path}: transition {n} must be '
+                             '[state, symbol, new state, new symbol, -1 or 1]')
+        state, symbol, new_state, new_symbol, direction = entry
+        if (state, symbol) in transitions:
+            raise ValueError(f'{path}: transition {n} repeats ({state!r}, {symbol!r})')
+        transitions[(state, symbol)] = (new_state, new_symbol, direction)
+    if not transitions:
+        raise ValueError(f'{path}: "transitions" must be a non-empty list')
+
+    return TuringMachine(
+        states=strings('states', True),
+        symbols=strings('symbols', True),
+        blank_symbol=strings('blank_symbol', False),
+        input_symbols=strings('input_symbols', True),
+        initial_state=strings('initial_state', False),
+        accepting_states=strings('accepting_states', True),
+        transitions=transitions,
+    )
+
+
+def parse_multitape(data, path, strings, tapes):
+    # "tapes": k, transitions [state, [k symbols], new state, [k symbols], [k moves]]
+    if not isinstance(tapes, int) or isinstance(tapes, bool) or tapes < 1:
+        raise ValueError(f'{path}: "tapes" must be a positive integer')
+
+    def symbols(value):
+        return (isinstance(value, list) and len(value) == tapes
+                and all(isinstance(v, str) for v in value))
+
+    transitions = {}
+    for n, entry in enumerate(data.get('transitions', ())):
+        if (not isinstance(entry, list) or len(entry) != 5
+                or not isinstance(entry[0], str) or not isinstance(entry[2], str)
+                or not symbols(entry[1]) or not symbols(entry[3])
+                or not isinstance(entry[4], list) or len(entry[4]) != tapes
+                or not all(move in (-1, 0, 1) for move in entry[4])):
+            raise ValueError(f'{path}: transition {n} must be [state, [{tapes} symbols], '
+                             f'new state, [{tapes} symbols], [{tapes} of -1, 0 or 1]]')
+        state, reads, new_state, writes, moves = entry
+        key = (state, tuple(reads))
+        if key in transitions:
+            raise ValueError(f'{path}: transition {n} repeats ({state!r}, {reads!r})')
+        transitions[key] = (new_state, tuple(writes), tuple(moves))
+    if not transitions:
+        raise ValueError(f'{path}: "transitions" must be a non-empty list')
+
+    return MultiTapeTuringMachine(
+        states=strings('states', True),
+        symbols=strings('symbols', True),
+        blank_symbol=strings('blank_symbol', False),
+        input_symbols=strings('input_symbols', True),
+        initial_state=strings('initial_state', False),
+        accepting_states=strings('accepting_states', True),
+        tapes=tapes,
+        transitions=transitions,
+    )
+
+
+def parse_choices(data, path, strings):
+    # "nondeterministic": true, single-tape rows where a state and symbol may repeat
+    transitions = {}
+    for n, entry in enumerate(data.get('transitions', ())):
+        if (not isinstance(entry, list) or len(entry) != 5
+                or not all(isinstance(v, str) for v in entry[:4])
+                or entry[4] not in (-1, 1)):
+            raise ValueError(f'{path}: transition {n} must be '
+                             '[state, symbol, new state, new symbol, -1 or 1]')
+        state, symbol, *action = entry
+        choices = transitions.setdefault((state, symbol), [])
+        if tuple(action) in choices:
+            raise ValueError(f'{path}: transition {n} repeats {entry!r}')
+        choices.append(tuple(action))
+    if not transitions:
+        raise ValueError(f'{path}: "transitions" must be a non-empty list')
+
+    return NondeterministicTuringMachine(
+        states=strings('states', True),
+        symbols=strings('symbols', True),
+        blank_symbol=strings('blank_symbol', False),
+        input_symbols=strings('input_symbols', True),
+        initial_state=strings('initial_state', False),
+        accepting_states=strings('accepting_states', True),
+        transitions={key: tuple(choices) for key, choices in transitions.items()},
+    )
+
+
+def load_machine(name, cache=True, minimize=False):
+    # name is a built-in machine ('addition') or a path to a definition file;
+    # parsed and compiled machines are pickled under CACHE_DIR by content hash.
+    # minimize loads the machine analyze() reduces it to
+    path = machine_path(name)
+    with open(path, 'rb') as f:
+        source = f.read()
+    cached = os.path.join(CACHE_DIR, fingerprint(source) + ('.min' if minimize else '')
+                          + '.pickle')
+    if cache:
+        try:
+            with open(cached, 'rb') as f:
+                kind, definition, compiled = pickle.load(f)
+            machine_class, compiled_class = MACHINE_CLASSES[kind]
+            tm = machine_class(**definition)
+            tm.compiled = compiled_class(**compiled)
+            return tm
+        except Exception:
+            # missing or unreadable entry, rebuild it below
+            pass
+
+    tm = parse_machine(source, path)
+    if minimize:
+        tm = analyze(tm).machine
+    tm.compile()
+    if cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # only builtins are pickled so entries don't depend on this module's name
+            entry = (type(tm).__name__, init_fields(tm), init_fields(tm.compiled))
+            partial = f'{cached}.{os.getpid()}'
+            with open(partial, 'wb') as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(partial, cached)
+        except OSError:
+            pass
+    return tm
+
+
+def symbols_of(value):
+    # a transition reads and writes one symbol, or a tuple of them on a multi-tape machine
+    return value if isinstance(value, tuple) else (value,)
+
+
+def actions_of(tm, value):
+    # a transition takes one action, or one of a tuple of them on a nondeterministic machine
+    return value if isinstance(tm, NondeterministicTuringMachine) else (value,)
+
+
+@dataclass
+class Analysis:
+    original: TuringMachine | MultiTapeTuringMachine | NondeterministicTuringMachine
+    machine: TuringMachine | MultiTapeTuringMachine | NondeterministicTuringMachine
+    undeclared_states: set[str]
+    undeclared_symbols: set[str]
+    unreachable_states: set[str]
+    unreachable_transitions: int
+    # equivalent states, each group is folded into its first member
+    merged_states: list[list[str]]
+
+    @property
+    def problems(self):
+        return bool(self.undeclared_states or self.undeclared_symbols)
+
+    def report(self):
+        before = len(self.machine.states) + len(self.unreachable_states) + sum(
+            len(group) - 1 for group in self.merged_states)
+        lines = [f'states       {before} -> {len(self.machine.states)}',
+                 f'transitions  {len(self.original.transitions)} -> '
+                 f'{len(self.machine.transitions)}']
+        for label, names in (('undeclared states', self.undeclared_states),
+                             ('undeclared symbols', self.undeclared_symbols),
+                             ('unreachable states', self.unreachable_states)):
+            if names:
+                lines.append(f'{label}: {", ".join(sorted(names))}')
+        if self.unreachable_transitions:
+            lines.append(f'unreachable transitions: {self.unreachable_transitions}')
+        for first, *rest in self.merged_states:
+            lines.append(f'merged into {first}: {", ".join(rest)}')
+        return '\n'.join(lines)
+
+
+def analyze(tm):
+    # check the declarations, then minimize: drop the states the initial state
+    # never reaches and merge states that act the same on every symbol
+    used_states = {tm.initial_state, *tm.accepting_states}
+    used_symbols = set()
+    outgoing = {}
+    for (state, read), value in tm.transitions.items():
+        used_states.add(state)
+        used_symbols.update(symbols_of(read))
+        for new_state, write, _ in actions_of(tm, value):
+            used_states.add(new_state)
+            used_symbols.update(symbols_of(write))
+            outgoing.setdefault(state, []).append(new_state)
+    undeclared_symbols = used_symbols - {*tm.symbols, *tm.input_symbols, tm.blank_symbol}
+
+    reachable = {tm.initial_state}
+    pending = [tm.initial_state]
+    while pending:
+        for new_state in outgoing.get(pending.pop(), ()):
+            if new_state not in reachable:
+                reachable.add(new_state)
+                pending.append(new_state)
+
+    # partition refinement: start from accepting / not accepting and split
+    # classes until all members write, move and go to the same classes
+    reads = sorted({read for state, read in tm.transitions if state in reachable})
+    block = {state: state in tm.accepting_states for state in reachable}
+    count = 0
+    while True:
+        classes = {}
+        refined = {}
+        for state in sorted(reachable):
+            signature = [block[state]]
+            for read in reads:
+                value = tm.transitions.get((state, read))
+                signature.append(value and frozenset(
+                    (block[new_state], write, move)
+                    for new_state, write, move in actions_of(tm, value)))
+            refined[state] = classes.setdefault(tuple(signature), len(classes))
+        block = refined
+        if len(classes) == count:
+            break
+        count = len(classes)
+
+    groups = {}
+    for state in sorted(reachable, key=lambda state: (state != tm.initial_state, state)):
+        groups.setdefault(block[state], []).append(state)
+    name = {state: group[0] for group in groups.values() for state in group}
 
-    str1 = ("1"*mx)+"-"
-    str2 = ("1"*mn)
+    def renamed(value):
+        # merged targets can make two of a state's choices the same
+        actions = tuple(dict.fromkeys((name[new_state], write, move)
+                                      for new_state, write, move in actions_of(tm, value)))
+        return actions if isinstance(tm, NondeterministicTuringMachine) else actions[0]
 
-    unaryinput = str1+str2
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
+    transitions = {key: renamed(value) for key, value in tm.transitions.items()
+                   if name.get(key[0]) == key[0]}
+    machine = replace(
+        tm,
+        states={group[0] for group in groups.values()},
+        symbols=tm.symbols | undeclared_symbols,
+        accepting_states={group[0] for group in groups.values()
+                          if group[0] in tm.accepting_states},
+        transitions=transitions,
+    )
+    return Analysis(
+        original=tm,
+        machine=machine,
+        undeclared_states=used_states - tm.states,
+        undeclared_symbols=undeclared_symbols,
+        unreachable_states=(tm.states | used_states) - reachable,
+        unreachable_transitions=sum(state not in reachable for state, _ in tm.transitions),
+        merged_states=[group for group in groups.values() if len(group) > 1],
+    )
 
-    tm.initialize(res)
 
+def machine_source(tm):
+    # the layout of machines/*.json, one transition per line
+    header = {
+        'states': sorted(tm.states),
+        'symbols': sorted(tm.symbols),
+        'blank_symbol': tm.blank_symbol,
+        'input_symbols': sorted(tm.input_symbols),
+        'initial_state': tm.initial_state,
+        'accepting_states': sorted(tm.accepting_states),
+    }
+    if isinstance(tm, MultiTapeTuringMachine):
+        header['tapes'] = tm.tapes
+    if isinstance(tm, NondeterministicTuringMachine):
+        header['nondeterministic'] = True
+    rows = [json.dumps([state, read, *action])
+            for (state, read), value in tm.transitions.items()
+            for action in actions_of(tm, value)]
+    lines = [f'  {json.dumps(key)}: {json.dumps(value)},' for key, value in header.items()]
+    return '\n'.join(['{', *lines, '  "transitions": [',
+                      ',\n'.join(f'    {row}' for row in rows), '  ]', '}', ''])
+
+
+def tape_input(word):
+    return dict(enumerate(word))
+
+
+def addition_input(num1, num2):
+    return tape_input(("1"*int(num1))+"+"+("1"*int(num2)))
+
+
+def subtraction_input(num1, num2):
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(("1"*mx)+"-"+("1"*mn))
+
+
+def multiplication_input(num1, num2):
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(("1"*mn)+"*"+("1"*mx)+">")
+
+
+def division_input(num1, num2):
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(("1"*mn)+"/"+("1"*mx)+">")
+
+
+def square_input(num1):
+    return tape_input(("1"*int(num1))+"^")
+
+
+def binaryaddition_input(num1, num2):
+    return tape_input(f'{int(num1):b}+{int(num2):b}')
+
+
+def binarysubtraction_input(num1, num2):
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(f'{mx:b}-{mn:b}')
+
+
+def binarymultiplication_input(num1, num2):
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(f'{mn:b}*{mx:b}')
+
+
+def binarydivision_input(num1, num2):
+    # like division_input the larger number is divided by the smaller;
+    # the machine leaves "quotient_remainder" on the tape, and rejects a
+    # divisor of 0
+    mx, mn = max(int(num1), int(num2)), min(int(num1), int(num2))
+    return tape_input(f'{mn:b}/{mx:b}')
+
+
+def binarysquare_input(num1):
+    return tape_input(f'{int(num1):b}^')
+
+
+def palindromecheck_input(word):
+    return tape_input(str(word))
+
+
+def paritycheck_input(word):
+    return tape_input(str(word))
+
+
+def evenoddcheck_input(num):
+    return tape_input('1'*int(num))
+
+
+def doublewordcheck_input(word):
+    return tape_input(word)
+
+
+class Visualizer:
+    # redraws the tape in place instead of scrolling: the window only moves
+    # when the head nears its edge, and each frame rewrites just the cells,
+    # head marker and status that changed since the last one. At most fps
+    # frames a second are drawn; the machine runs speed steps a second
+    # (None is flat out) whatever the frame rate.
+    # keys: space pause/resume, n one step while paused, + / - double or halve
+    # the speed, f fast-forward, q stop watching (show then finishes the run
+    # without drawing)
+    def __init__(self, tm, window=30, fps=30, speed=None, out=None):
+        self.tm = tm
+        self.width = 2 * window + 1
+        self.margin = window // 3
+        self.fps = fps
+        self.speed = speed
+        self.out = out or sys.stdout
+        self.left = None
+        self.cells = None
+        self.marker = None
+        self.status = None
+        self.paused = False
+        self.stopped = False
+
+    def render(self):
+        tm = self.tm
+        if self.left is None or not (self.left + self.margin <= tm.head
+                                     < self.left + self.width - self.margin):
+            self.left = tm.head - self.width // 2
+        glyph = tm.glyphs.get
+        cells = [glyph(a, a) for a in (tm.tape[i]
+                                       for i in range(self.left, self.left + self.width))]
+        speed = 'fast' if self.speed is None else f'{self.speed:g}/s'
+        status = (f'( {tm.current_state} )  step {tm.steps}  head {tm.head}  '
+                  f'speed {speed}{"  paused" if self.paused else ""}'
+                  f'{"  halted" if tm.halted else ""}')
+        return cells, tm.head - self.left, status
+
+    def draw(self):
+        cells, marker, status = self.render()
+        column = lambda k: 5 + 2 * k
+        if self.cells is None:
+            out = [' ' * (column(marker) - 1), '\033[1;33m⮯\033[0m\n',
+                   '\033[34m... \033[0m',
+                   ' '.join(f'\033[1;32m{a}\033[0m' for a in cells),
+                   f'\n\033[1;34m{status}\033[0m\n']
+        else:
+            out = ['\033[3F']
+            if marker != self.marker:
+                out.append(f'\033[{column(self.marker)}G '
+                           f'\033[{column(marker)}G\033[1;33m⮯\033[0m')
+            out.append('\033[1E')
+            out.extend(f'\033[{column(k)}G\033[1;32m{a}\033[0m'
+                       for k, (a, old) in enumerate(zip(cells, self.cells)) if a != old)
+            out.append('\033[1E')
+            if status != self.status:
+                out.append(f'\r\033[1;34m{status}\033[0m\033[K')
+            out.append('\033[1E')
+        self.out.write(''.join(out))
+        self.out.flush()
+        self.cells, self.marker, self.status = cells, marker, status
+
+    def key(self, key):
+        if key == ' ':
+            self.paused = not self.paused
+        elif key == 'n' and self.paused and not self.tm.halted:
+            self.tm.advance(1)
+        elif key == '+' and self.speed is not None:
+            self.speed *= 2
+        elif key == '-':
+            self.speed = max((self.speed or 1 << 20) / 2, 1)
+        elif key == 'f':
+            self.speed = None
+            self.paused = False
+        elif key == 'q':
+            self.stopped = True
+
+    def wait(self, seconds, keys):
+        # sleep, handling any keys pressed in the meantime
+        if keys and select.select([sys.stdin], [], [], max(seconds, 0))[0]:
+            self.key(sys.stdin.read(1))
+        elif seconds > 0:
+            time.sleep(seconds)
+
+    def play(self):
+        tm = self.tm
+        keys = termios is not None and sys.stdin.isatty()
+        if keys:
+            saved = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin)
+        try:
+            frame = 1 / self.fps
+            owed = 0
+            self.draw()
+            while not tm.halted and not self.stopped:
+                started = time.monotonic()
+                if not self.paused:
+                    if self.speed is None:
+                        steps = 1 << 10
+                        while not tm.halted and time.monotonic() - started < frame:
+                            tm.advance(steps)
+                            steps *= 2
+                    else:
+                        owed += self.speed * frame
+                        tm.advance(int(owed))
+                        owed -= int(owed)
+                self.draw()
+                self.wait(started + frame - time.monotonic(), keys)
+        finally:
+            if keys:
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, saved)
+
+
+def unary_output(tm):
+    # the answer is the number of 1s left on the tape
+    return tm.tape.count('1')
+
+
+def division_output(tm):
+    # remainder, then quotient further right; no remainder leaves one run
+    runs = [stop - start for start, stop in tm.tape.segments()]
+    return (runs[-1], runs[0] if len(runs) > 1 else 0)
+
+
+def binary_words(tm):
+    # decoded on the tape's own cells, see Tape.binary
+    return tm.tape.binary()
+
+
+def binary_output(tm):
+    return binary_words(tm)[0]
+
+
+def binarydivision_output(tm):
+    quotient, remainder = binary_words(tm)
+    return quotient, remainder
+
+
+def multitape_output(tm):
+    # the multi-tape machines write their answer in unary on tape 1
+    return tm.tape[1].count('1')
+
+
+def multitapedivision_output(tm):
+    # quotient on tape 1; the remainder is how far along the divisor copy
+    # on tape 2 the last round got, those cells are marked x
+    return tm.tape[1].count('1'), tm.tape[2].count('x')
+
+
+def accepted_output(tm):
+    return tm.accepted_input()
+
+
+def show(tm):
+    if sys.stdout.isatty():
+        Visualizer(tm).play()
+        if not tm.halted:
+            tm.run()
+        return
     while not tm.halted:
         tm.print()
         tm.step()
         # time.sleep(0.25)
 
 
-def multiplication():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G' 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol='\033[31m⧈\033[0m',
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('A', '1'): ('B', '\033[31m⧈\033[0m', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', '*'): ('C', '*', 1),
-        ('C', '1'): ('D', 'x', 1),
-        ('D', '>'): ('D', '>', 1),
-        ('D', '1'): ('D', '1', 1),
-        ('D', '\033[31m⧈\033[0m'): ('E', '1', -1),
-        ('E', '1'): ('E', '1', -1),
-        ('E', '>'): ('E', '>', -1),
-        ('E', 'x'): ('C', 'x', 1),
-        ('C', '>'): ('F', '>', -1),
-        ('F', 'x'): ('F', '1', -1),
-        ('F', '*'): ('F', '*', -1),
-        ('F', '1'): ('F', '1', -1),
-        ('F', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-        ('A', '*'): ('G', '\033[31m⧈\033[0m', 1),
-        ('G', '1'): ('G', '\033[31m⧈\033[0m', 1),
-        ('G', '>'): ('Accept', '\033[31m⧈\033[0m', 1),
-    })
-
-    # Driver code
+def addition():
+    tm = load_machine('addition')
     num1 = int(input("Enter number: "))
     num2 = int(input("Enter number: "))
-    mx = max(num1, num2)
-    mn = min(num1, num2)
+    tm.initialize(addition_input(num1, num2))
+    show(tm)
+    print(f"\n{num1} + {num2} = {unary_output(tm)}\n")
 
-    str1 = ("1"*mn)+"*"
-    str2 = ("1"*mx)+">"
 
-    unaryinput = str1+str2
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
+def subtraction():
+    tm = load_machine('subtraction')
+    num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(subtraction_input(num1, num2))
+    show(tm)
+    print(f"\n{max(num1, num2)} - {min(num1, num2)} = {unary_output(tm)}\n")
 
-    tm.initialize(res)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
+def multiplication():
+    tm = load_machine('multiplication')
+    num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(multiplication_input(num1, num2))
+    show(tm)
+    print(f"\n{num1} * {num2} = {unary_output(tm)}\n")
 
 
 def division():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G', 'I', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol='\033[31m⧈\033[0m',
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-                       ('A', '1'): ('B', '\033[31m⧈\033[0m', 1),
-                       ('B', '1'): ('B', '1', 1),
-                       ('B', '/'): ('C', '/', 1),
-                       ('C', '1'): ('D', 'x', -1),
-                       ('D', '/'): ('D', '/', -1),
-                       ('D', '1'): ('D', '1', -1),
-                       ('D', '\033[31m⧈\033[0m'): ('A', '1', 1),
-                       ('C', 'x'): ('C', 'x', 1),
-                       ('D', 'x'): ('D', 'x', -1),
-                       ('A', '/'): ('E', '/', 1),
-                       ('E', 'x'): ('E', 'x', 1),
-                       ('E', '1'): ('E', '1', 1),
-                       ('E', '>'): ('E', '>', 1),
-                       ('E', '\033[31m⧈\033[0m'): ('F', '1', -1),
-                       ('F', '>'): ('F', '>', -1),
-                       ('F', '/'): ('F', '/', -1),
-                       ('F', '1'): ('F', '1', -1),
-                       ('F', 'x'): ('F', 'x', -1),
-                       ('F', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-                       ('C', '>'): ('G', '\033[31m⧈\033[0m', -1),
-                       ('G', 'x'): ('G', '\033[31m⧈\033[0m', -1),
-                       ('G', '/'): ('G', '\033[31m⧈\033[0m', -1),
-                       ('G', '1'): ('G', '\033[31m⧈\033[0m', -1),
-                       ('G', '\033[31m⧈\033[0m'): ('I', '\033[31m⧈\033[0m', 1),
-                       ('I', '\033[31m⧈\033[0m'): ('I', '\033[31m⧈\033[0m', 1),
-                       ('I', '1'): ('Accept', '1', -1),
-                       })
-
+    tm = load_machine('division')
     num1 = int(input("Enter number: "))
     num2 = int(input("Enter number: "))
-    mx = max(num1, num2)
-    mn = min(num1, num2)
+    tm.initialize(division_input(num1, num2))
+    show(tm)
+    quotient, remainder = division_output(tm)
+    print(f"\n{max(num1, num2)} / {min(num1, num2)} = {quotient} remainder {remainder}\n")
 
-    str1 = ("1"*mn)+"/"
-    str2 = ("1"*mx)+">"
 
-    unaryinput = str1+str2
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
+def square():
+    tm = load_machine('square')
+    num1 = int(input("Enter number: "))
+    tm.initialize(square_input(num1))
+    show(tm)
+    print(f"\n{num1}^2 = {unary_output(tm)}\n")
 
-    tm.initialize(res)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
+def binaryaddition():
+    tm = load_machine('binaryaddition')
+    num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(binaryaddition_input(num1, num2))
+    show(tm)
+    print(f"\n{num1} + {num2} = {binary_output(tm)}\n")
 
 
-def square():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G', 'K', 'Q', 'M', 'N', 'O', 'P', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol='\033[31m⧈\033[0m',
-                       input_symbols={'1'},
-                       initial_state='K',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('K', '1'): ('Q', 'x', 1),
-        ('Q', '1'): ('Q', '1', 1),
-        ('Q', '^'): ('M', '^', 1),
-        ('M', '\033[31m⧈\033[0m'): ('N', '1', -1),
-        ('M', '1'): ('M', '1', 1),
-        ('N', '1'): ('N', '1', -1),
-        ('N', '^'): ('N', '^', -1),
-        ('N', 'x'): ('K', 'x', 1),
-        ('K', '^'): ('O', '^', 1),
-        ('O', '1'): ('O', '1', 1),
-        ('O', '\033[31m⧈\033[0m'): ('P', '>', -1),
-        ('P', '1'): ('P', '1', -1),
-        ('P', '^'): ('P', '^', -1),
-        ('P', 'x'): ('P', '1', -1),
-        ('P', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-        ('A', '1'): ('B', '\033[31m⧈\033[0m', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', '^'): ('C', '^', 1),
-        ('C', '1'): ('D', 'x', 1),
-        ('D', '>'): ('D', '>', 1),
-        ('D', '1'): ('D', '1', 1),
-        ('D', '\033[31m⧈\033[0m'): ('E', '1', -1),
-        ('E', '1'): ('E', '1', -1),
-        ('E', '>'): ('E', '>', -1),
-        ('E', 'x'): ('C', 'x', 1),
-        ('C', '>'): ('F', '>', -1),
-        ('F', 'x'): ('F', '1', -1),
-        ('F', '^'): ('F', '^', -1),
-        ('F', '1'): ('F', '1', -1),
-        ('F', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-        ('A', '^'): ('G', '\033[31m⧈\033[0m', 1),
-        ('G', '1'): ('G', '\033[31m⧈\033[0m', 1),
-        ('G', '>'): ('Accept', '\033[31m⧈\033[0m', 1),
-    })
-
-    # Driver code
+def binarysubtraction():
+    tm = load_machine('binarysubtraction')
     num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(binarysubtraction_input(num1, num2))
+    show(tm)
+    print(f"\n{max(num1, num2)} - {min(num1, num2)} = {binary_output(tm)}\n")
 
-    unaryinput = ("1"*num1)+"^"
 
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
+def binarymultiplication():
+    tm = load_machine('binarymultiplication')
+    num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(binarymultiplication_input(num1, num2))
+    show(tm)
+    print(f"\n{num1} * {num2} = {binary_output(tm)}\n")
 
-    tm.initialize(res)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
+def binarydivision():
+    tm = load_machine('binarydivision')
+    num1 = int(input("Enter number: "))
+    num2 = int(input("Enter number: "))
+    tm.initialize(binarydivision_input(num1, num2))
+    show(tm)
+    if not tm.accepted_input():
+        print("\nCannot divide by 0\n")
+        return
+    quotient, remainder = binarydivision_output(tm)
+    print(f"\n{max(num1, num2)} / {min(num1, num2)} = {quotient} remainder {remainder}\n")
 
 
-def palindromecheck():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G', 'I', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol='\033[31m⧈\033[0m',
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-                       ('A', '1'): ('E', '\033[31m⧈\033[0m', 1),
-                       ('E', '1'): ('E', '1', 1),
-                       ('E', '0'): ('E', '0', 1),
-                       ('E', '\033[31m⧈\033[0m'): ('F', '\033[31m⧈\033[0m', -1),
-                       ('F', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-                       ('F', '1'): ('D', '\033[31m⧈\033[0m', -1),
-                       ('D', '1'): ('D', '1', -1),
-                       ('D', '0'): ('D', '0', -1),
-                       ('D', '\033[31m⧈\033[0m'): ('A', '\033[31m⧈\033[0m', 1),
-                       ('A', '0'): ('B', '\033[31m⧈\033[0m', 1),
-                       ('B', '1'): ('B', '1', 1),
-                       ('B', '0'): ('B', '0', 1),
-                       ('B', '\033[31m⧈\033[0m'): ('C', '\033[31m⧈\033[0m', -1),
-                       ('C', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-                       ('C', '0'): ('D', '\033[31m⧈\033[0m', -1),
-                       ('A', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-                       })
-
-    unaryinput = str(input("Enter string  (1/0) : "))
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
-
-    tm.initialize(res)
+def binarysquare():
+    tm = load_machine('binarysquare')
+    num1 = int(input("Enter number: "))
+    tm.initialize(binarysquare_input(num1))
+    show(tm)
+    print(f"\n{num1}^2 = {binary_output(tm)}\n")
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.15)
+
+def palindromecheck():
+    tm = load_machine('palindromecheck')
+    word = str(input("Enter string  (1/0) : "))
+    tm.initialize(palindromecheck_input(word))
+    show(tm)
 
     if(tm.accepted_input() == True):
         print("\nPalindrome\n")
@@ -352,38 +2622,11 @@ def palindromecheck():
 
 
 def paritycheck():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol="\033[31m⧈\033[0m",
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('A', '0'): ('A', '\033[31m⧈\033[0m', 1),
-        ('A', '1'): ('B', 'x', 1),
-        ('B', '0'): ('B', '0', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', '\033[31m⧈\033[0m'): ('C', '\033[31m⧈\033[0m', -1),
-        ('C', '0'): ('C', '\033[31m⧈\033[0m', -1),
-        ('C', '1'): ('D', '\033[31m⧈\033[0m', -1),
-        ('D', '0'): ('D', '0', -1),
-        ('D', '1'): ('D', '1', -1),
-        ('D', 'x'): ('A', '\033[31m⧈\033[0m', 1),
-        ('A', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-    })
-
-    unaryinput = str(input("Enter string  (1/0) : "))
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
-
-    tm.initialize(res)
+    tm = load_machine('paritycheck')
+    word = str(input("Enter string  (1/0) : "))
+    tm.initialize(paritycheck_input(word))
+    show(tm)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
     if(tm.accepted_input() == True):
         print("\nEven Parity\n")
     else:
@@ -391,44 +2634,971 @@ def paritycheck():
 
 
 def evenoddcheck():
-    tm = TuringMachine(states={'A', 'B', 'C', 'D', 'Accept'},
-                       symbols={'0', '1'},
-                       blank_symbol="\033[31m⧈\033[0m",
-                       input_symbols={'1'},
-                       initial_state='A',
-                       accepting_states={'Accept'},
-                       transitions={
-        ('A', '1'): ('B', 'x', 1),
-        ('A', '\033[31m⧈\033[0m'): ('Accept', '\033[31m⧈\033[0m', 1),
-        ('B', '1'): ('B', '1', 1),
-        ('B', '\033[31m⧈\033[0m'): ('C', '\033[31m⧈\033[0m', -1),
-        ('C', '1'): ('D', '\033[31m⧈\033[0m', -1),
-        ('D', '1'): ('D', '1', -1),
-        ('D', 'x'): ('A', '\033[31m⧈\033[0m', 1),
-        ('C', 'x'): ('E', '1', -1),
-        ('E', '\033[31m⧈\033[0m'): ('E', '\033[31m⧈\033[0m', 1),
-    })
-
+    tm = load_machine('evenoddcheck')
     num = int(input("Enter number : "))
-    unaryinput = ('1'*num)
-    temp = (split(unaryinput))
-    res = dict()
-    for idx, ele in enumerate(temp):
-        res[idx] = ele
-
-    tm.initialize(res)
+    tm.initialize(evenoddcheck_input(num))
+    show(tm)
 
-    while not tm.halted:
-        tm.print()
-        tm.step()
-        # time.sleep(0.25)
     if(tm.accepted_input() == True):
         print("\nEven\n")
     else:
         print("\nOdd\n")
 
 
+# name -> (machine builder, input encoder, output decoder)
+MACHINES = {
+    'addition': (partial(load_machine, 'addition'), addition_input, unary_output),
+    'subtraction': (partial(load_machine, 'subtraction'), subtraction_input, unary_output),
+    'multiplication': (partial(load_machine, 'multiplication'), multiplication_input,
+                       unary_output),
+    'division': (partial(load_machine, 'division'), division_input, division_output),
+    'square': (partial(load_machine, 'square'), square_input, unary_output),
+    'binaryaddition': (partial(load_machine, 'binaryaddition'), binaryaddition_input,
+                       binary_output),
+    'binarysubtraction': (partial(load_machine, 'binarysubtraction'), binarysubtraction_input,
+                          binary_output),
+    'binarymultiplication': (partial(load_machine, 'binarymultiplication'),
+                             binarymultiplication_input, binary_output),
+    'binarydivision': (partial(load_machine, 'binarydivision'), binarydivision_input,
+                       binarydivision_output),
+    'binarysquare': (partial(load_machine, 'binarysquare'), binarysquare_input, binary_output),
+    'multitapeaddition': (partial(load_machine, 'multitapeaddition'), addition_input,
+                          multitape_output),
+    'multitapesubtraction': (partial(load_machine, 'multitapesubtraction'), subtraction_input,
+                             multitape_output),
+    'multitapemultiplication': (partial(load_machine, 'multitapemultiplication'),
+                                multiplication_input, multitape_output),
+    'multitapedivision': (partial(load_machine, 'multitapedivision'), division_input,
+                          multitapedivision_output),
+    'multitapesquare': (partial(load_machine, 'multitapesquare'), square_input,
+                        multitape_output),
+    'palindromecheck': (partial(load_machine, 'palindromecheck'), palindromecheck_input,
+                        accepted_output),
+    'paritycheck': (partial(load_machine, 'paritycheck'), paritycheck_input, accepted_output),
+    'evenoddcheck': (partial(load_machine, 'evenoddcheck'), evenoddcheck_input, accepted_output),
+    # nondeterministic, guesses where the second copy of the word starts
+    'doublewordcheck': (partial(load_machine, 'doublewordcheck'), doublewordcheck_input,
+                        accepted_output),
+}
+
+
+def binary_strings(max_length, alphabet='01'):
+    for length in range(max_length + 1):
+        for letters in product(alphabet, repeat=length):
+            yield ''.join(letters)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+worker_machine = None
+worker_tape = 'bytes'
+
+
+def start_worker(machine, tape):
+    global worker_machine, worker_tape
+    worker_machine, worker_tape = machine, tape
+
+
+def run_chunk(chunk, budget):
+    tm = worker_machine
+    results = []
+    for index, word in chunk:
+        tm.initialize(tape_input(word) if isinstance(word, str) else word, worker_tape)
+        results.append((index, tm.run(**budget)))
+    return results
+
+
+def expand_chunk(chunk):
+    # successors() of a slice of a NondeterministicTuringMachine frontier
+    c = worker_machine.compiled
+    blank_chunk = bytes([c.blank]) * CHOICE_CHUNK
+    return [successors(c, configuration, blank_chunk) for configuration in chunk]
+
+
+def run_batch(machine, inputs, workers=None, chunksize=256, ordered=True,
+              max_steps=None, max_seconds=None, max_tape=None, detect_loops=False,
+              tape='bytes'):
+    # inputs are words or tape dicts; yields RunResults in input order, or
+    # (index, RunResult) pairs as soon as their chunk finishes if not ordered
+    budget = dict(max_steps=max_steps, max_seconds=max_seconds, max_tape=max_tape,
+                  detect_loops=detect_loops)
+    in_flight = 4 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers, initializer=start_worker,
+                             initargs=(machine, tape)) as pool:
+        pending = deque()
+        for chunk in chunked(enumerate(inputs), chunksize):
+            pending.append(pool.submit(run_chunk, chunk, budget))
+            if len(pending) >= in_flight:
+                yield from collect(pending, ordered)
+        while pending:
+            yield from collect(pending, ordered)
+
+
+def collect(pending, ordered):
+    if ordered:
+        done = [pending.popleft()]
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+    for future in done:
+        for index, result in future.result():
+            yield result if ordered else (index, result)
+
+
+def run_lockstep(machine, inputs, max_steps=None):
+    # advances every input together, one fancy-indexed numpy step per iteration
+    if np is None:
+        raise RuntimeError('run_lockstep needs numpy installed')
+    if not isinstance(machine, TuringMachine):
+        raise ValueError('run_lockstep runs deterministic single-tape machines only')
+    words = [tape_input(word) if isinstance(word, str) else word for word in inputs]
+    c = machine.compile({a for word in words for a in word.values()})
+    width = len(c.symbols)
+    next_state = np.frombuffer(c.next_state, dtype=np.int32)
+    write = np.frombuffer(c.write, dtype=np.int32).astype(np.uint8)
+    move = np.frombuffer(c.move, dtype=np.int8).astype(np.int64)
+
+    positions = [pos for word in words for pos in word] or [0]
+    lo, hi = min(0, *positions), max(0, *positions)
+    margin = 16
+    origin = margin - lo
+    tapes = np.full((len(words), hi - lo + 1 + 2 * margin), c.blank, dtype=np.uint8)
+    for n, word in enumerate(words):
+        for pos, name in word.items():
+            tapes[n, pos + origin] = c.symbol_ids[name]
+    heads = np.full(len(words), origin, dtype=np.int64)
+    states = np.full(len(words), c.initial, dtype=np.int32)
+    steps = np.zeros(len(words), dtype=np.int64)
+    halted = np.zeros(len(words), dtype=bool)
+
+    active = np.arange(len(words))
+    t = 0
+    while active.size and (max_steps is None or t < max_steps):
+        # index the tapes as one flat array, row offset plus head
+        cells = tapes.reshape(-1)
+        at = active * tapes.shape[1] + heads[active]
+        i = states[active] * width + cells[at]
+        new_states = next_state[i]
+        stop = new_states < 0
+        if stop.any():
+            halted[active[stop]] = True
+            steps[active[stop]] = t
+            keep = ~stop
+            active, at, i, new_states = active[keep], at[keep], i[keep], new_states[keep]
+        cells[at] = write[i]
+        h = heads[active] + move[i]
+        heads[active] = h
+        states[active] = new_states
+        t += 1
+        if h.size and h.min() == 0:
+            grow = tapes.shape[1]
+            tapes = np.concatenate(
+                (np.full((len(words), grow), c.blank, dtype=np.uint8), tapes), axis=1)
+            heads += grow
+            origin += grow
+        if h.size and h.max() == tapes.shape[1] - 1:
+            tapes = np.concatenate(
+                (tapes, np.full(tapes.shape, c.blank, dtype=np.uint8)), axis=1)
+    steps[active] = t
+
+    blank = bytes([c.blank])
+    results = []
+    for n in range(len(words)):
+        state = int(states[n])
+        accepted = bool(halted[n]) and bool(c.accepting[state])
+        results.append(RunResult(
+            outcome=(Outcome.TIMEOUT if not halted[n] else
+                     Outcome.ACCEPT if accepted else Outcome.REJECT),
+            halted=bool(halted[n]),
+            accepted=accepted,
+            steps=int(steps[n]),
+            state=c.states[state],
+            head=int(heads[n]) - origin,
+            tape=''.join(c.symbols[a] for a in tapes[n].tobytes().strip(blank)),
+        ))
+    return results
+
+
+def run_prefixes(machine, inputs, max_steps=None, max_tape=None, detect_loops=False,
+                 tape='bytes'):
+    # runs every input but shares the steps taken before the head first reaches
+    # a cell the inputs differ in. Inputs (words, or tape dicts laid out from 0)
+    # go in a trie; a node's run has HOLE in the cell after its prefix, halts
+    # on reading it and forks once per child with the cell filled in. A run
+    # that stops before that answers for every input below its node; 'chunks'
+    # tapes make the forks O(1) once tapes are long.
+    # Returns the RunResults in input order and the number of steps run
+    if not isinstance(machine, TuringMachine):
+        raise ValueError('run_prefixes runs deterministic single-tape machines only')
+    words = []
+    for word in inputs:
+        if not isinstance(word, str):
+            if set(word) != set(range(len(word))):
+                raise ValueError('run_prefixes needs inputs laid out from position 0')
+            word = [word[pos] for pos in range(len(word))]
+        words.append(tuple(word))
+    trie = {}
+    for n, word in enumerate(words):
+        node = trie
+        for a in word:
+            node = node.setdefault(a, {})
+        # None marks the inputs that end here
+        node.setdefault(None, []).append(n)
+
+    c = machine.compile({HOLE, *(a for word in words for a in word)})
+    hole = c.symbol_ids[HOLE]
+    # decoded once the input is back on the tape, not on every stop at a hole
+    decoder, machine.decoder = machine.decoder, None
+    machine.initialize({}, tape)
+    results = [None] * len(words)
+    ran = 0
+    pending = [(machine, trie, 0)]
+    try:
+        while pending:
+            tm, node, depth = pending.pop()
+            holed = any(a is not None for a in node)
+            if holed:
+                tm.tape.write(depth, hole)
+            result = tm.run(None if max_steps is None else max_steps - tm.steps,
+                            max_tape=max_tape, detect_loops=detect_loops)
+            ran += result.steps
+            if holed and tm.halted and tm.tape.read(tm.head) == hole:
+                tm.halted = False
+                for k, (a, child) in enumerate(node.items()):
+                    # the last child carries on with this machine
+                    branch = tm if k == len(node) - 1 else tm.fork()
+                    if a is None:
+                        branch.tape.write(depth, c.blank)
+                        pending.append((branch, {None: child}, depth))
+                    else:
+                        branch.tape.write(depth, c.symbol_ids[a])
+                        pending.append((branch, child, depth + 1))
+                continue
+
+            below = [node]
+            for subtree in below:
+                for a, child in subtree.items():
+                    if a is not None:
+                        below.append(child)
+                        continue
+                    for n in child:
+                        # the cells from the hole on were never read: put the
+                        # input back for its result, then the hole again
+                        word = words[n]
+                        if holed:
+                            for pos in range(depth, max(len(word), depth + 1)):
+                                tm.tape.write(pos, c.symbol_ids[word[pos]]
+                                              if pos < len(word) else c.blank)
+                        results[n] = RunResult(
+                            outcome=result.outcome,
+                            halted=tm.halted,
+                            accepted=result.accepted,
+                            steps=tm.steps,
+                            state=tm.current_state,
+                            head=tm.head,
+                            tape=tm.tape.contents(),
+                            value=decoder(tm) if decoder and result.accepted else None,
+                        )
+                        if holed:
+                            for pos in range(depth, len(word)):
+                                tm.tape.write(pos, c.blank)
+                            tm.tape.write(depth, hole)
+    finally:
+        machine.decoder = decoder
+    return results, ran
+
+
+class ResultCache:
+    # LRU of RunResults keyed by machine fingerprint, input tape, tape kind and
+    # budget (max_tape counts cells, runs or chunks depending on the kind),
+    # bounded by entry count and approximate bytes; safe to share between threads
+    def __init__(self, max_entries=4096, max_bytes=64 << 20, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def key(tm, input_symbols, tape='bytes', max_steps=None, max_tape=None,
+            detect_loops=False):
+        # a word and the tape dict it spells are the same input; either is
+        # kept as a digest so large inputs don't sit in memory twice
+        if isinstance(input_symbols, str):
+            input_symbols = tape_input(input_symbols)
+        cells = hashlib.sha256(json.dumps(sorted(input_symbols.items())).encode()).digest()
+        return tm.fingerprint(), cells, tape, max_steps, max_tape, detect_loops
+
+    @staticmethod
+    def entry_size(key, result):
+        # what the entry holds on its own; the fingerprint is the machine's
+        return (sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(result)
+                + sys.getsizeof(result.tape) + sys.getsizeof(result.state)
+                + sys.getsizeof(result.value) + 128)
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        size = self.entry_size(key, result)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= self.entry_size(key, old)
+            self.entries[key] = result
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                old_key, old = self.entries.popitem(last=False)
+                self.size -= self.entry_size(old_key, old)
+
+    def run(self, tm, input_symbols, tape='bytes', max_steps=None, max_seconds=None,
+            max_tape=None, detect_loops=False):
+        # input_symbols may be a word or a tape dict; results cut short by the
+        # wall clock depend on the host, so those are never stored
+        key = self.key(tm, input_symbols, tape, max_steps, max_tape, detect_loops)
+        result = self.get(key)
+        if result is not None:
+            return result
+        if isinstance(input_symbols, str):
+            input_symbols = tape_input(input_symbols)
+        tm.initialize(input_symbols, tape)
+        result = tm.run(max_steps, max_seconds=max_seconds, max_tape=max_tape,
+                        detect_loops=detect_loops)
+        if max_seconds is None or result.outcome is not Outcome.TIMEOUT:
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.size,
+            }
+
+    def save(self, path=None):
+        path = path or self.path
+        with self.lock:
+            # plain tuples, so the file doesn't depend on this module's name
+            rows = [(key, result.outcome.value, result.halted, result.accepted,
+                     result.steps, result.state, result.head, result.tape, result.value)
+                    for key, result in self.entries.items()]
+        partial = f'{path}.{os.getpid()}'
+        with open(partial, 'wb') as f:
+            pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+
+    def load(self, path=None):
+        with open(path or self.path, 'rb') as f:
+            rows = pickle.load(f)
+        for key, outcome, *rest in rows:
+            self.put(key, RunResult(Outcome(outcome), *rest))
+
+
+# input size n -> encoder arguments used by the benchmark
+BENCHMARK_INPUTS = {
+    'addition': lambda n: (n, n),
+    'subtraction': lambda n: (n, n // 2),
+    'multiplication': lambda n: (n, n),
+    'division': lambda n: (max(n // 8, 1), n),
+    'square': lambda n: (n,),
+    'binaryaddition': lambda n: (n, n),
+    'binarysubtraction': lambda n: (n, n // 2),
+    'binarymultiplication': lambda n: (n, n),
+    'binarydivision': lambda n: (max(n // 8, 1), n),
+    'binarysquare': lambda n: (n,),
+    'multitapeaddition': lambda n: (n, n),
+    'multitapesubtraction': lambda n: (n, n // 2),
+    'multitapemultiplication': lambda n: (n, n),
+    'multitapedivision': lambda n: (max(n // 8, 1), n),
+    'multitapesquare': lambda n: (n,),
+    'palindromecheck': lambda n: (('01' * n)[:n // 2] + ('01' * n)[:n - n // 2][::-1],),
+    'paritycheck': lambda n: ('1' * n,),
+    'evenoddcheck': lambda n: (n,),
+    'doublewordcheck': lambda n: (('01' * n)[:n // 2] * 2,),
+}
+
+
+def time_runs(tm, tape_symbols, tape, loops):
+    # total wall time of loops runs, leaving out initialize()
+    seconds = 0
+    for _ in range(loops):
+        tm.initialize(tape_symbols, tape)
+        start = time.perf_counter()
+        result = tm.run()
+        seconds += time.perf_counter() - start
+    return seconds, result
+
+
+def benchmark(sizes, tape='bytes', repeat=3, machines=MACHINES, min_seconds=0.1):
+    # best-of-repeat wall time per run for every machine and size, then a
+    # separate tracemalloc run for peak memory so tracing doesn't skew the
+    # timings. Like timeit's autorange, each sample runs the machine often
+    # enough to take min_seconds, so short runs aren't lost in timer noise
+    results = []
+    for name in machines:
+        build, encode, _ = MACHINES[name]
+        tm = build()
+        for size in sizes:
+            tape_symbols = encode(*BENCHMARK_INPUTS[name](size))
+            loops = 1
+            while True:
+                total, result = time_runs(tm, tape_symbols, tape, loops)
+                if total >= min_seconds:
+                    break
+                loops *= 2
+            seconds = total / loops
+            for _ in range(repeat - 1):
+                seconds = min(seconds, time_runs(tm, tape_symbols, tape, loops)[0] / loops)
+
+            tracemalloc.start()
+            tm.initialize(tape_symbols, tape)
+            tracemalloc.reset_peak()
+            tm.run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results.append({
+                'machine': name,
+                'size': size,
+                'steps': result.steps,
+                'seconds': seconds,
+                'loops': loops,
+                'steps_per_second': result.steps / seconds if seconds else None,
+                'peak_bytes': peak,
+                'tape_size': (sum(map(len, tm.tape)) if isinstance(tm.tape, list)
+                              else len(tm.tape)),
+            })
+    return results
+
+
+def benchmark_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='benchmark', description='Time the built-in machines over growing inputs.')
+    parser.add_argument('machines', nargs='*', help='default: all of them')
+    parser.add_argument('--min-size', type=int, default=4)
+    parser.add_argument('--max-size', type=int, default=64)
+    parser.add_argument('--factor', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='seconds each timing sample runs for at least')
+    parser.add_argument('--tape', choices=TAPES, default='bytes')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='report the slowdown against an earlier --output file')
+    parser.add_argument('--tolerance', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--min-duration', type=float, default=0.001,
+                        help='runs shorter than this many seconds, before and after, '
+                             'only have their step counts compared')
+    options = parser.parse_args(argv)
+    unknown = set(options.machines).difference(MACHINES)
+    if unknown:
+        parser.error(f'unknown machines: {", ".join(sorted(unknown))}')
+
+    sizes = []
+    size = options.min_size
+    while size <= options.max_size:
+        sizes.append(size)
+        size *= options.factor
+    results = benchmark(sizes, options.tape, options.repeat, options.machines or MACHINES,
+                        options.min_time)
+    report = {'tape': options.tape, 'python': sys.version.split()[0], 'results': results}
+
+    print(f"{'machine':16}{'size':>8}{'steps':>14}{'time':>12}{'speed':>16}"
+          f"{'peak':>13}{'tape':>10}")
+    for row in results:
+        print(f"{row['machine']:16}{row['size']:>8}{row['steps']:>14}"
+              f"{row['seconds']:>11.4f}s{row['steps_per_second'] or 0:>14.0f}/s"
+              f"{row['peak_bytes']:>12}B{row['tape_size']:>10}")
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+            f.write('\n')
+
+    if options.compare:
+        with open(options.compare) as f:
+            before = {(row['machine'], row['size']): row for row in json.load(f)['results']}
+        regressions = 0
+        for row in results:
+            old = before.get((row['machine'], row['size']))
+            if old is None or not old['seconds']:
+                continue
+            ratio = row['seconds'] / old['seconds']
+            timed = max(row['seconds'], old['seconds']) >= options.min_duration
+            if timed and ratio > options.tolerance or row['steps'] != old['steps']:
+                regressions += 1
+                print(f"regression: {row['machine']} size {row['size']}: "
+                      f"{ratio:.2f}x time, steps {old['steps']} -> {row['steps']}")
+        sys.exit(1 if regressions else 0)
+
+
+# the serve protocol, one JSON object per line each way:
+#   {"id": ..., "machine": "addition", "args": [3, 4]} plus any of max_steps,
+#   max_seconds, max_tape, detect_loops, tape ("bytes" / "runs") and
+#   contents (true to get the final tape back) queues a job; the reply is
+#   "queued", then "progress" events with the steps so far, then "result"
+#   (or "cancelled" / "error"), or just "busy" if the queue is full and the
+#   job should be sent again later
+#   {"cancel": id} stops a queued or running job; ids belong to the connection
+#   that sent the job, and max_seconds counts from when the job starts running
+#   {"stats": true} replies with queue depth, job counts and latency percentiles
+service_machines = {}
+
+
+def service_machine(name):
+    # built once per worker process
+    tm = service_machines.get(name)
+    if tm is None:
+        build, _, decode = MACHINES[name]
+        tm = service_machines[name] = build()
+        tm.decoder = decode
+    return tm
+
+
+def run_slice(name, args, tape, saved, budget):
+    # one slice of a service job in a pool process; returns the result, the
+    # steps taken so far and, if the slice ran out first, a checkpoint to
+    # carry on from
+    tm = service_machine(name)
+    if saved is None:
+        tm.initialize(MACHINES[name][1](*args), tape)
+    else:
+        tm.restore(io.BytesIO(saved), name)
+    result = tm.run(**budget)
+    if result.outcome is Outcome.TIMEOUT and isinstance(tm, TuringMachine):
+        f = io.BytesIO()
+        write_configuration(f, CHECKPOINT_MAGIC, tm)
+        return result, tm.steps, f.getvalue()
+    return result, tm.steps, None
+
+
+def run_alone(connection, name, args, tape, budget):
+    # a whole service job in a process of its own, for machines run_slice
+    # can't checkpoint; sends back what run_slice returns, or the error
+    try:
+        connection.send(run_slice(name, args, tape, None, budget))
+    except Exception as error:
+        connection.send(error)
+    connection.close()
+
+
+@dataclass
+class ServiceJob:
+    id: object
+    machine: str
+    writer: asyncio.StreamWriter
+    args: list = field(default_factory=list)
+    max_steps: int = None
+    max_seconds: float = None
+    max_tape: int = None
+    detect_loops: bool = False
+    tape: str = 'bytes'
+    contents: bool = False
+    queued_at: float = field(default_factory=time.monotonic)
+    cancelled: bool = False
+
+
+class EvaluationService:
+    # jobs wait in a bounded queue (a job that finds it full is turned away
+    # as busy, so the client's cancels and stats are always read) and run on
+    # a process pool in slices of slice_seconds, which is how often progress
+    # is reported and how long a cancel can take to land. Machines that
+    # can't be checkpointed run in one go in a process of their own instead,
+    # which a cancel terminates
+    def __init__(self, workers=None, queue_size=1024, slice_seconds=0.25):
+        self.workers = workers or os.cpu_count() or 1
+        # forkserver children don't inherit the listening or client sockets
+        self.context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+            else 'spawn')
+        self.queue = asyncio.Queue(queue_size)
+        self.slice_seconds = slice_seconds
+        self.pool = None
+        self.jobs = {}
+        self.next_id = 0
+        self.running = 0
+        self.counts = Counter()
+        self.latencies = deque(maxlen=10000)
+
+    async def send(self, writer, message):
+        try:
+            writer.write(json.dumps(message).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle(self, reader, writer):
+        while line := await reader.readline():
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('expected a JSON object')
+                if 'cancel' in request:
+                    await self.cancel(request['cancel'], writer)
+                elif 'stats' in request:
+                    await self.send(writer, {'event': 'stats', **self.stats()})
+                else:
+                    await self.submit(request, writer)
+            except (ValueError, TypeError) as error:
+                await self.send(writer, {'id': request.get('id') if isinstance(request, dict)
+                                         else None, 'event': 'error', 'error': str(error)})
+        for job in self.jobs.values():
+            if job.writer is writer:
+                job.cancelled = True
+        writer.close()
+
+    async def submit(self, request, writer):
+        known = {f.name for f in fields(ServiceJob) if f.init} - {'id', 'writer', 'queued_at',
+                                                                  'cancelled'}
+        unknown = set(request) - known - {'id'}
+        if unknown:
+            raise ValueError(f'unknown fields {sorted(unknown)}')
+        if request.get('machine') not in MACHINES:
+            raise ValueError(f'unknown machine {request.get("machine")!r}')
+        if request.get('tape', 'bytes') not in TAPES:
+            raise ValueError(f'unknown tape {request["tape"]!r}')
+        if 'id' not in request:
+            self.next_id += 1
+            request['id'] = self.next_id
+        if (writer, request['id']) in self.jobs:
+            raise ValueError(f'job {request["id"]!r} is already queued or running')
+        job = ServiceJob(writer=writer, **request)
+        job.args = list(job.args or ())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            await self.send(writer, {'id': job.id, 'event': 'busy',
+                                     'queue_depth': self.queue.qsize()})
+            return
+        self.jobs[writer, job.id] = job
+        await self.send(writer, {'id': job.id, 'event': 'queued',
+                                 'queue_depth': self.queue.qsize()})
+
+    async def cancel(self, job_id, writer):
+        job = self.jobs.get((writer, job_id))
+        if job is None:
+            await self.send(writer, {'id': job_id, 'event': 'error', 'error': 'no such job'})
+            return
+        # a queued job is dropped when it is taken off the queue, a running
+        # one after its current slice or, if it runs alone, within a slice
+        job.cancelled = True
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await self.run(loop, job)
+            except Exception as error:
+                self.counts['failed'] += 1
+                await self.send(job.writer, {'id': job.id, 'event': 'error', 'error': str(error)})
+            finally:
+                self.running -= 1
+                self.jobs.pop((job.writer, job.id), None)
+
+    async def run(self, loop, job):
+        deadline = None if job.max_seconds is None else time.monotonic() + job.max_seconds
+        # multi-tape and nondeterministic machines can't be checkpointed
+        sliced = isinstance(service_machine(job.machine), TuringMachine)
+        saved = None
+        while True:
+            if job.cancelled:
+                self.counts['cancelled'] += 1
+                await self.send(job.writer, {'id': job.id, 'event': 'cancelled'})
+                return
+            seconds = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if sliced:
+                seconds = self.slice_seconds if seconds is None else min(seconds,
+                                                                         self.slice_seconds)
+            budget = dict(max_steps=job.max_steps, max_seconds=seconds, max_tape=job.max_tape,
+                          detect_loops=job.detect_loops)
+            if sliced:
+                result, steps, saved = await loop.run_in_executor(
+                    self.pool, run_slice, job.machine, job.args, job.tape, saved, budget)
+            else:
+                reply = await self.run_alone(loop, job, budget)
+                if reply is None:
+                    continue
+                result, steps, saved = reply
+            if job.max_steps is not None:
+                job.max_steps -= result.steps
+            if saved is None or job.max_steps == 0 or (
+                    deadline is not None and time.monotonic() >= deadline):
+                break
+            await self.send(job.writer, {'id': job.id, 'event': 'progress', 'steps': steps})
+
+        latency = time.monotonic() - job.queued_at
+        self.latencies.append(latency)
+        self.counts['completed'] += 1
+        message = {'id': job.id, 'event': 'result', 'verdict': result.verdict,
+                   'steps': steps, 'state': result.state, 'value': result.value,
+                   'seconds': latency}
+        if job.contents:
+            message['tape'] = result.tape
+        await self.send(job.writer, message)
+
+    async def run_alone(self, loop, job, budget):
+        # returns run_slice's reply, or None if the job was cancelled first
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=run_alone, daemon=True, args=(
+            sender, job.machine, job.args, job.tape, budget))
+        process.start()
+        sender.close()
+        replied = asyncio.Event()
+        loop.add_reader(receiver.fileno(), replied.set)
+        try:
+            while not replied.is_set():
+                if job.cancelled:
+                    return None
+                try:
+                    await asyncio.wait_for(replied.wait(), self.slice_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                reply = receiver.recv()
+            except EOFError:
+                process.join()
+                raise RuntimeError(f'job process exited with code {process.exitcode}') from None
+        finally:
+            loop.remove_reader(receiver.fileno())
+            receiver.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] if latencies else None
+
+        return {
+            'queue_depth': self.queue.qsize(),
+            'running': self.running,
+            'completed': self.counts['completed'],
+            'cancelled': self.counts['cancelled'],
+            'failed': self.counts['failed'],
+            'latency_p50': percentile(0.5),
+            'latency_p90': percentile(0.9),
+            'latency_p99': percentile(0.99),
+        }
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None, ready=None):
+        loop = asyncio.get_running_loop()
+        # SIGTERM stops serving and shuts the pool down instead of orphaning it
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        with ProcessPoolExecutor(self.workers) as self.pool:
+            # start the workers before listening so they don't inherit the socket
+            await loop.run_in_executor(self.pool, os.getpid)
+            dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+            if path is not None:
+                server = await asyncio.start_unix_server(self.handle, path)
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+            if ready is not None:
+                ready(server)
+            try:
+                async with server:
+                    await server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            finally:
+                for task in dispatchers:
+                    task.cancel()
+                self.pool.shutdown(cancel_futures=True)
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='serve', description='Evaluate machine jobs sent as JSON lines over a local socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', metavar='PATH', help='listen on a Unix socket instead')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--queue-size', type=int, default=1024)
+    parser.add_argument('--slice-seconds', type=float, default=0.25,
+                        help='how often running jobs report progress and check for cancels')
+    options = parser.parse_args(argv)
+
+    service = EvaluationService(options.workers, options.queue_size, options.slice_seconds)
+    where = options.socket or f'{options.host}:{options.port}'
+    try:
+        asyncio.run(service.serve(options.host, options.port, options.socket,
+                                  ready=lambda server: print(f'serving on {where}', flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+def analyze_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='analyze', description='Check machine definitions and report what '
+                                   'minimizing them removes. Exits 1 on undeclared '
+                                   'states or symbols.')
+    parser.add_argument('machines', nargs='*',
+                        help='built-in names or definition files (default: all built-ins)')
+    parser.add_argument('--output', metavar='DIR',
+                        help='write each minimized definition to DIR/NAME.json')
+    options = parser.parse_args(argv)
+
+    problems = False
+    for name in options.machines or MACHINES:
+        analysis = analyze(load_machine(name, cache=False))
+        problems = problems or analysis.problems
+        print(f'{name}:')
+        print(''.join(f'  {line}\n' for line in analysis.report().splitlines()), end='')
+        if options.output:
+            os.makedirs(options.output, exist_ok=True)
+            base = os.path.splitext(os.path.basename(name))[0]
+            with open(os.path.join(options.output, base + '.json'), 'w') as f:
+                f.write(machine_source(analysis.machine))
+    if problems:
+        sys.exit(1)
+
+
+def parse_trace(value):
+    if value == 'halt':
+        return value
+    every = int(value)
+    if every <= 0:
+        raise argparse.ArgumentTypeError(f'expected a positive number or "halt", not {value}')
+    return every
+
+
+def batch(argv):
+    parser = argparse.ArgumentParser(
+        description='Run a machine to halt without printing every step. '
+                    'Without arguments, one input per line is read from stdin.')
+    parser.add_argument('machine', choices=MACHINES)
+    parser.add_argument('args', nargs='*')
+    parser.add_argument('--max-steps', type=int)
+    parser.add_argument('--max-seconds', type=float)
+    parser.add_argument('--max-tape', type=int, help='tape cells (or runs) allowed')
+    parser.add_argument('--detect-loops', action='store_true')
+    parser.add_argument('--tape', choices=TAPES, default='bytes')
+    parser.add_argument('--trace', type=parse_trace,
+                        help='print the tape every N steps, or "halt"')
+    parser.add_argument('--workers', type=int,
+                        help='spread the inputs over this many processes')
+    parser.add_argument('--cache', metavar='FILE',
+                        help='reuse results stored in FILE and add new ones to it')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='print a per-transition profile and write folded '
+                             'stacks for flamegraph.pl to FILE')
+    parser.add_argument('--decode', action='store_true',
+                        help="print the machine's answer instead of the tape")
+    parser.add_argument('--trace-file', metavar='FILE',
+                        help='record every step to FILE (FILE.N for the Nth '
+                             'stdin input) for TraceReader to replay')
+    parser.add_argument('--share-prefixes', action='store_true',
+                        help='run the inputs together, sharing the steps taken before '
+                             'the head reaches a cell they differ in')
+    parser.add_argument('--minimize', action='store_true',
+                        help='run the machine with unreachable and equivalent states '
+                             'removed, see the analyze command')
+    options = parser.parse_args(argv)
+
+    build, encode, decode = MACHINES[options.machine]
+    tm = build(minimize=options.minimize)
+    tm.decoder = decode
+    if not isinstance(tm, TuringMachine) and (
+            options.detect_loops or options.profile or options.trace_file
+            or options.share_prefixes):
+        parser.error('--detect-loops, --profile, --trace-file and --share-prefixes need '
+                     'a deterministic single-tape machine')
+    jobs = [options.args] if options.args else (
+        line.split() for line in sys.stdin if line.strip())
+    if options.share_prefixes:
+        jobs = list(jobs)
+        results, ran = run_prefixes(tm, (encode(*args) for args in jobs), options.max_steps,
+                                    options.max_tape, options.detect_loops, options.tape)
+        for args, result in zip(jobs, results):
+            print(' '.join(args), result.verdict, result.steps,
+                  result.value if options.decode else result.tape, sep='\t')
+        total = sum(result.steps for result in results)
+        print(f'{ran} steps run for {total}, {total - ran} shared', file=sys.stderr)
+        return
+    if options.workers:
+        jobs = list(jobs)
+        results = run_batch(tm, (encode(*args) for args in jobs), options.workers,
+                            max_steps=options.max_steps, max_seconds=options.max_seconds,
+                            max_tape=options.max_tape, detect_loops=options.detect_loops,
+                            tape=options.tape)
+        for args, result in zip(jobs, results):
+            print(' '.join(args), result.verdict, result.steps,
+                  result.value if options.decode else result.tape, sep='\t')
+        return
+    if options.cache:
+        cache = ResultCache(path=options.cache)
+        for args in jobs:
+            result = cache.run(tm, encode(*args), options.tape, options.max_steps,
+                               options.max_seconds, options.max_tape, options.detect_loops)
+            print(' '.join(args), result.verdict, result.steps,
+                  result.value if options.decode else result.tape, sep='\t')
+        cache.save()
+        return
+    profile = Profile() if options.profile else None
+    for n, args in enumerate(jobs):
+        tm.initialize(encode(*args), options.tape)
+        sink = None
+        if options.trace_file:
+            sink = TraceWriter(options.trace_file if options.args
+                               else f'{options.trace_file}.{n}')
+        try:
+            result = tm.run(options.max_steps, options.trace,
+                            options.max_seconds, options.max_tape, options.detect_loops,
+                            profile=profile, sink=sink)
+        finally:
+            if sink is not None:
+                sink.close()
+        print(' '.join(args), result.verdict, result.steps,
+              result.value if options.decode else result.tape, sep='\t')
+    if profile is not None:
+        print(profile.report())
+        with open(options.profile, 'w') as f:
+            f.write(profile.folded())
+
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        analyze_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1:
+        batch(sys.argv[1:])
+        sys.exit()
 
     i = 0
     while i == 0:
@@ -449,7 +3619,17 @@ if __name__ == '__main__':
         print("|------------------------------------------|")
         print("|        8. Check Even/Odd                 |")
         print("|------------------------------------------|")
-        print("|        9. Exit                           |")
+        print("|        9. Binary Addition                |")
+        print("|------------------------------------------|")
+        print("|       10. Binary Subtraction             |")
+        print("|------------------------------------------|")
+        print("|       11. Binary Multiplication          |")
+        print("|------------------------------------------|")
+        print("|       12. Binary Division                |")
+        print("|------------------------------------------|")
+        print("|       13. Binary Square                  |")
+        print("|------------------------------------------|")
+        print("|       14. Exit                           |")
         print("*------------------------------------------*")
         choice = int(input("\n\nEnter Choice: "))
         if(choice == 1):
@@ -469,5 +3649,15 @@ if __name__ == '__main__':
         if(choice == 8):
             evenoddcheck()
         if(choice == 9):
+            binaryaddition()
+        if(choice == 10):
+            binarysubtraction()
+        if(choice == 11):
+            binarymultiplication()
+        if(choice == 12):
+            binarydivision()
+        if(choice == 13):
+            binarysquare()
+        if(choice == 14):
             print("Thank You")
             break
@@ -2,6 +2,10 @@ import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 
+BLANK = '_'
+# how symbols are drawn by TuringMachine.print, the engine never sees these
+GLYPHS = {BLANK: '\033[31m~\033[0m'}
+
 
 @dataclass
 class TuringMachine:
@@ -12,6 +16,7 @@ class TuringMachine:
     initial_state: str
     accepting_states: set[str]
     transitions: dict[tuple[str, str], tuple[str, str, int]]
+    glyphs: dict[str, str] = field(default_factory=lambda: GLYPHS)
 
     head: int = field(init=False)
     tape: defaultdict[int, str] = field(init=False)
@@ -22,7 +27,7 @@ class TuringMachine:
         self.head = 0
         self.halted = False
         self.current_state = self.initial_state
-        self.tape = defaultdict(lambda: "\033[31m~\033[0m", input_symbols)
+        self.tape = defaultdict(lambda: self.blank_symbol, input_symbols)
 
     def step(self):
         if self.halted:
@@ -46,8 +51,10 @@ class TuringMachine:
     def print(self, window=30):
         print(f'{" " * (2 * window + 4)}\033[1;33m⮯\033[0m')
         print('\033[34m... \033[0m', end='')
-        print("\033[1;32m ".join(self.tape[i] for i in range(
-            self.head - window, self.head + window+12)), end=''"\033[0m")
+        glyph = self.glyphs.get
+        cells = (self.tape[i] for i in range(
+            self.head - window, self.head + window+12))
+        print("\033[1;32m ".join(glyph(a, a) for a in cells), end=''"\033[0m")
         print(f'\033[1;34m >>> ( {self.current_state} )\033[0m\n')
 
 
@@ -58,7 +65,7 @@ def split(word):
 def addition():
     tm = TuringMachine(states={'A', 'B', 'C', 'D', 'Accept'},
                        symbols={'0', '1'},
-                       blank_symbol="\033[31m~\033[0m",
+                       blank_symbol=BLANK,
                        input_symbols={'1'},
                        initial_state='A',
                        accepting_states={'Accept'},
@@ -66,10 +73,10 @@ def addition():
         ('A', '1'): ('A', '1', 1),
         ('A', '+'): ('B', '1', 1),
         ('B', '1'): ('B', '1', 1),
-        ('B', "\033[31m~\033[0m"): ('C', "\033[31m~\033[0m", -1),
-        ('C', '1'): ('D', "\033[31m~\033[0m", -1),
+        ('B', BLANK): ('C', BLANK, -1),
+        ('C', '1'): ('D', BLANK, -1),
         ('D', '1'): ('D', '1', -1),
-        ('D', "\033[31m~\033[0m"): ('Accept', "\033[31m~\033[0m", 1),
+        ('D', BLANK): ('Accept', BLANK, 1),
     })
 
     num1 = int(input("Enter number: "))
@@ -94,22 +101,22 @@ def addition():
 def subtraction():
     tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'Accept'},
                        symbols={'0', '1'},
-                       blank_symbol='\033[31m~\033[0m',
+                       blank_symbol=BLANK,
                        input_symbols={'1'},
                        initial_state='A',
                        accepting_states={'Accept'},
                        transitions={
-        ('A', '1'): ('B', '\033[31m~\033[0m', 1),
+        ('A', '1'): ('B', BLANK, 1),
         ('B', '1'): ('B', '1', 1),
         ('B', '-'): ('B', '-', 1),
-        ('B', '\033[31m~\033[0m'): ('C', '\033[31m~\033[0m', -1),
-        ('C', '1'): ('D', '\033[31m~\033[0m', -1),
+        ('B', BLANK): ('C', BLANK, -1),
+        ('C', '1'): ('D', BLANK, -1),
         ('C', '-'): ('E', '1', -1),
         ('D', '-'): ('D', '-', -1),
         ('D', '1'): ('D', '1', -1),
-        ('D', '\033[31m~\033[0m'): ('A', '\033[31m~\033[0m', 1),
+        ('D', BLANK): ('A', BLANK, 1),
         ('E', '1'): ('E', '1', -1),
-        ('E', '\033[31m~\033[0m'): ('Accept', '\033[31m~\033[0m', 1),
+        ('E', BLANK): ('Accept', BLANK, 1),
     })
 
     num1 = int(input("Enter number: "))
@@ -136,18 +143,18 @@ def subtraction():
 def multiplication():
     tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G' 'Accept'},
                        symbols={'0', '1'},
-                       blank_symbol='\033[31m~\033[0m',
+                       blank_symbol=BLANK,
                        input_symbols={'1'},
                        initial_state='A',
                        accepting_states={'Accept'},
                        transitions={
-        ('A', '1'): ('B', '\033[31m~\033[0m', 1),
+        ('A', '1'): ('B', BLANK, 1),
         ('B', '1'): ('B', '1', 1),
         ('B', '*'): ('C', '*', 1),
         ('C', '1'): ('D', 'x', 1),
         ('D', '>'): ('D', '>', 1),
         ('D', '1'): ('D', '1', 1),
-        ('D', '\033[31m~\033[0m'): ('E', '1', -1),
+        ('D', BLANK): ('E', '1', -1),
         ('E', '1'): ('E', '1', -1),
         ('E', '>'): ('E', '>', -1),
         ('E', 'x'): ('C', 'x', 1),
@@ -155,10 +162,10 @@ def multiplication():
         ('F', 'x'): ('F', '1', -1),
         ('F', '*'): ('F', '*', -1),
         ('F', '1'): ('F', '1', -1),
-        ('F', '\033[31m~\033[0m'): ('A', '\033[31m~\033[0m', 1),
-        ('A', '*'): ('G', '\033[31m~\033[0m', 1),
-        ('G', '1'): ('G', '\033[31m~\033[0m', 1),
-        ('G', '>'): ('Accept', '\033[31m~\033[0m', 1),
+        ('F', BLANK): ('A', BLANK, 1),
+        ('A', '*'): ('G', BLANK, 1),
+        ('G', '1'): ('G', BLANK, 1),
+        ('G', '>'): ('Accept', BLANK, 1),
     })
 
     num1 = int(input("Enter number: "))
@@ -185,36 +192,36 @@ def multiplication():
 def division():
     tm = TuringMachine(states={'A', 'B', 'C', 'D', 'E', 'F', 'G', 'I', 'Accept'},
                        symbols={'0', '1'},
-                       blank_symbol='\033[31m~\033[0m',
+                       blank_symbol=BLANK,
                        input_symbols={'1'},
                        initial_state='A',
                        accepting_states={'Accept'},
                        transitions={
-        ('A', '1'): ('B', '\033[31m~\033[0m', 1),
+        ('A', '1'): ('B', BLANK, 1),
         ('B', '1'): ('B', '1', 1),
         ('B', '/'): ('C', '/', 1),
         ('C', '1'): ('D', 'x', -1),
         ('D', '/'): ('D', '/', -1),
         ('D', '1'): ('D', '1', -1),
-        ('D', '\033[31m~\033[0m'): ('A', '1', 1),
+        ('D', BLANK): ('A', '1', 1),
         ('C', 'x'): ('C', 'x', 1),
         ('D', 'x'): ('D', 'x', -1),
         ('A', '/'): ('E', '/', 1),
         ('E', 'x'): ('E', 'x', 1),
         ('E', '1'): ('E', '1', 1),
         ('E', '>'): ('E', '>', 1),
-        ('E', '\033[31m~\033[0m'): ('F', '1', -1),
+        ('E', BLANK): ('F', '1', -1),
         ('F', '>'): ('F', '>', -1),
         ('F', '/'): ('F', '/', -1),
         ('F', '1'): ('F', '1', -1),
         ('F', 'x'): ('F', 'x', -1),
-        ('F', '\033[31m~\033[0m'): ('A', '\033[31m~\033[0m', 1),
-        ('C', '>'): ('G', '\033[31m~\033[0m', -1),
-        ('G', 'x'): ('G', '\033[31m~\033[0m', -1),
-        ('G', '/'): ('G', '\033[31m~\033[0m', -1),
-        ('G', '1'): ('G', '\033[31m~\033[0m', -1),
-        ('G', '\033[31m~\033[0m'): ('I', '\033[31m~\033[0m', 1),
-        ('I', '\033[31m~\033[0m'): ('I', '\033[31m~\033[0m', 1),
+        ('F', BLANK): ('A', BLANK, 1),
+        ('C', '>'): ('G', BLANK, -1),
+        ('G', 'x'): ('G', BLANK, -1),
+        ('G', '/'): ('G', BLANK, -1),
+        ('G', '1'): ('G', BLANK, -1),
+        ('G', BLANK): ('I', BLANK, 1),
+        ('I', BLANK): ('I', BLANK, 1),
         ('I', '1'): ('Accept', '1', -1),
     })
 